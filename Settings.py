@@ -13,12 +13,62 @@ ASSETS_PER_ROW = 13
 
 ASSETS_FOLDER_PATH = r"assets"
 
+ASSET_PACK_PATH = r"assets.pack" # packed copy of the assets folder, None to read the PNGs directly
+
+ASSET_LOADER_THREADS = 8
+
+ASSET_MEMORY_LIMIT = 128 * 1024 * 1024 # bytes of decoded assets kept in memory, None for no limit
+
 TILE_SIZE = 16
 
+CHUNK_SIZE = 16
+
+SPRITE_CACHE_SIZE = 512
+
+TEXT_CACHE_SIZE = 1024
+
+CHUNK_SURFACE_CACHE_SIZE = 256
+
+SPATIAL_CELL_SIZE = 64 # size in pixels of the off-grid hit-test buckets
+
+ZOOM_LEVELS = (2, 1, 0.5, 0.25, 0.125) # editor magnifications picked with the mouse wheel (the first is the default; below 1 only halvings)
+
+MINIMAP_SIZE = (200, 120) # pixels of the minimap drawn over the editor's top-right corner
+
 TILE_MAP_SCROLL_SPEED = 2
 
 ASSETS_SCROLL_SPEED = 3
 
+MAP_FORMAT = "json" # format used when saving maps: "json" or "binary" (both can be loaded)
+
+STREAMING_LOAD_THRESHOLD = 1024 * 1024 # JSON maps bigger than this (bytes) load in the background
+
+MAP_LOAD_BATCH_SIZE = 2000 # map entries handed from the loader thread at a time
+
+MAP_LOAD_QUEUE_SIZE = 8 # batches buffered between the loader thread and the editor
+
+MAP_LOAD_FRAME_BUDGET = 8 # ms per frame spent inserting loaded map entries
+
+AUTOSAVE_INTERVAL = 120 # seconds between autosaves of an edited map (0 disables autosave)
+
+MAP_JOURNAL = True # log edits to a ".journal" file next to the open map (replayed on load)
+
+JOURNAL_FLUSH_INTERVAL = 1 # seconds between journal writes
+
+JOURNAL_COMPACT_RECORDS = 5000 # journal records that trigger a full save of the map
+
+UNDO_MEMORY_LIMIT = 32 * 1024 * 1024 # approximate bytes kept for undo/redo steps (oldest are dropped)
+
+BUCKET_FILL_RADIUS = 500 # tiles a bucket fill may spread from the clicked tile (the selected region bounds it instead)
+
+TARGET_FPS = 60
+
+IDLE_WAIT_TIMEOUT = 500 # ms to block waiting for input when nothing needs redrawing
+
+FRAME_STATS_WINDOW = 120 # frames averaged for the reported frame times
+
+SHOW_FRAME_STATS = False # debug: show the average and peak frame times in the window caption
+
 VERSION = "V1.0.0"
 
 FONT_PATH = r"Fonts\Lato-Bold.ttf"
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import sys
+import mmap
+import struct
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+from atomic_file import atomic_write
+from Settings import ASSETS_FOLDER_PATH, ASSET_PACK_PATH, ASSET_LOADER_THREADS
+
+# Pack layout:
+#   header: magic, version, asset count
+#   index : per asset -> name length, name, source mtime, width, height, data offset, data size
+#   data  : raw RGB pixels of every asset, back to back
+PACK_MAGIC = b"SAPK"
+PACK_VERSION = 1
+HEADER_FORMAT = "<4sII"
+ENTRY_FORMAT = "<dIIQQ"
+PIXEL_FORMAT = "RGB"
+
+
+def list_png_files(assets_folder=ASSETS_FOLDER_PATH):
+    """Return {asset name: file path} for every png in the assets folder."""
+    paths = {}
+    for file in os.listdir(assets_folder):
+        if file.endswith(".png"):
+            paths[os.path.splitext(file)[0]] = os.path.join(assets_folder, file)
+    return paths
+
+
+def build_pack(paths, pack_path=ASSET_PACK_PATH, decode=pygame.image.load, progress=None):
+    """Decode every asset in `paths` and write them into a single pack file.
+
+    `decode(path)` returns a Surface and runs on a thread pool; progress(done,
+    total) is called after each asset.
+    """
+    keys = list(paths)
+    entries = []
+    with ThreadPoolExecutor(max_workers=ASSET_LOADER_THREADS) as pool:
+        for done, (key, surface) in enumerate(zip(keys, pool.map(decode, [paths[key] for key in keys])), 1):
+            data = pygame.image.tostring(surface, PIXEL_FORMAT)
+            entries.append((key.encode("utf-8"), os.path.getmtime(paths[key]), surface.get_size(), data))
+            if progress is not None:
+                progress(done, len(keys))
+
+    offset = struct.calcsize(HEADER_FORMAT) + sum(
+        2 + len(name) + struct.calcsize(ENTRY_FORMAT) for name, _, _, _ in entries
+    )
+    with atomic_write(pack_path, "wb") as file:
+        file.write(struct.pack(HEADER_FORMAT, PACK_MAGIC, PACK_VERSION, len(entries)))
+        for name, mtime, (width, height), data in entries:
+            file.write(struct.pack("<H", len(name)) + name)
+            file.write(struct.pack(ENTRY_FORMAT, mtime, width, height, offset, len(data)))
+            offset += len(data)
+        for _, _, _, data in entries:
+            file.write(data)
+
+
+class AssetPack:
+    """A memory-mapped asset pack; surfaces are created straight from the mapped pixels."""
+
+    def __init__(self, pack_path=ASSET_PACK_PATH):
+        self.file = open(pack_path, "rb")
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.entries = self.read_index()
+        except (ValueError, struct.error):
+            self.file.close()
+            raise
+
+    def read_index(self):
+        """Return {asset name: (mtime, width, height, offset, size)}."""
+        magic, version, count = struct.unpack_from(HEADER_FORMAT, self.buffer, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError("not an asset pack or unsupported version")
+
+        entries = {}
+        position = struct.calcsize(HEADER_FORMAT)
+        for _ in range(count):
+            (name_length,) = struct.unpack_from("<H", self.buffer, position)
+            position += 2
+            name = self.buffer[position:position + name_length].decode("utf-8")
+            position += name_length
+            entries[name] = struct.unpack_from(ENTRY_FORMAT, self.buffer, position)
+            position += struct.calcsize(ENTRY_FORMAT)
+        return entries
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def is_current(self, paths):
+        """Return True if the pack holds exactly these files at their current mtimes."""
+        if paths.keys() != self.entries.keys():
+            return False
+        return all(os.path.getmtime(path) == self.entries[key][0] for key, path in paths.items())
+
+    def get_size(self, key):
+        return self.entries[key][1:3]
+
+    def surface(self, key):
+        """Return a Surface that reads its pixels from the mapped file."""
+        _, width, height, offset, size = self.entries[key]
+        return pygame.image.frombuffer(memoryview(self.buffer)[offset:offset + size], (width, height), PIXEL_FORMAT)
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+
+def open_pack(paths, pack_path=ASSET_PACK_PATH, decode=pygame.image.load, progress=None):
+    """Open the asset pack, rebuilding it first if it is missing or out of date."""
+    if os.path.exists(pack_path):
+        try:
+            pack = AssetPack(pack_path)
+            if pack.is_current(paths):
+                return pack
+            pack.close()
+        except (OSError, ValueError, struct.error):
+            pass
+
+    build_pack(paths, pack_path, decode, progress)
+    return AssetPack(pack_path)
+
+
+if __name__ == "__main__":
+    # Build step: python asset_pack.py [assets folder] [pack file]
+    assets_folder = sys.argv[1] if len(sys.argv) > 1 else ASSETS_FOLDER_PATH
+    pack_path = sys.argv[2] if len(sys.argv) > 2 else ASSET_PACK_PATH
+    build_pack(list_png_files(assets_folder), pack_path)
+    print(f"packed {len(AssetPack(pack_path).entries)} assets into {pack_path}")
@@ -0,0 +1,21 @@
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(file_path, mode="w"):
+    """Open a temporary file that replaces `file_path` once the block ends without an error.
+
+    The data is written next to the target and renamed into place, so an
+    interrupted or failed write never leaves a truncated file behind; the
+    temporary file is removed if the block raises.
+    """
+    temp_path = file_path + ".tmp"
+    try:
+        with open(temp_path, mode) as file:
+            yield file
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+import numpy as np
+import pygame
+from Settings import EDITOR_BACKGROUND_COLOR, CHUNK_SURFACE_CACHE_SIZE
+
+
+class ChunkRenderer:
+    """Pre-rendered surfaces of the grid layer, one per chunk.
+
+    A chunk surface is re-baked only when the chunk's revision in the TileMap
+    differs from the revision it was baked at, so a steady frame is just one
+    blit per visible chunk.
+
+    Zoomed-out views use mips: each level is the level above shrunk by half
+    and is rebuilt, like the full-size surface, only for chunks whose
+    revision changed. Every level keeps about as many pixels as the
+    full-size cache, i.e. four times as many surfaces as the level above.
+
+    Sprites larger than a tile are clipped at the chunk edge (and covered by
+    the next chunk's background), so the renderer also lists them per chunk
+    for the editor to draw whole after the chunk pass.
+    """
+
+    def __init__(self, tile_map, sprite_cache, tile_size, max_size=CHUNK_SURFACE_CACHE_SIZE):
+        self.tile_map = tile_map
+        self.sprite_cache = sprite_cache
+        self.tile_size = tile_size
+        self.max_size = max_size
+        self.surfaces = OrderedDict()  # key: (chunk_x, chunk_y) value: [revision, Surface]
+        self.mips = {}  # key: scale value: OrderedDict like `surfaces`
+        self.oversized = {}  # key: (chunk_x, chunk_y) value: [revision, [(type_name, rotate, x, y), ...]]
+        self.oversized_types = (0, None, np.zeros(0, np.uint16), 0)  # (type count, tile size, type ids + 1, margin)
+        self.bakes = 0
+
+    def reset(self, tile_size=None):
+        """Drop every baked surface, e.g. after a map load."""
+        if tile_size is not None:
+            self.tile_size = tile_size
+        self.surfaces.clear()
+        self.mips.clear()
+        self.oversized.clear()
+        self.oversized_types = (0, None, np.zeros(0, np.uint16), 0)
+
+    def get(self, chunk_pos, scale=1):
+        """Return the baked surface of a chunk at `scale` (1 or 1 / 2**n), or None if the chunk is empty."""
+        if scale < 1:
+            return self.get_mip(chunk_pos, scale)
+
+        chunk = self.tile_map.chunks.get(chunk_pos)
+        if chunk is None:
+            self.surfaces.pop(chunk_pos, None)
+            return None
+
+        baked = self.surfaces.get(chunk_pos)
+        if baked is None:
+            pixel_size = self.tile_map.chunk_size * self.tile_size
+            baked = [None, pygame.Surface((pixel_size, pixel_size))]
+            self.surfaces[chunk_pos] = baked
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(chunk_pos)
+
+        if baked[0] != chunk.revision:
+            self.bake(chunk, baked[1])
+            baked[0] = chunk.revision
+        return baked[1]
+
+    def get_mip(self, chunk_pos, scale):
+        """Return the chunk surface shrunk to `scale`, rebuilding it from the level above if the chunk changed."""
+        chunk = self.tile_map.chunks.get(chunk_pos)
+        if chunk is None:
+            return None
+
+        mips = self.mips.setdefault(scale, OrderedDict())
+        mip = mips.get(chunk_pos)
+        if mip is None:
+            mip = [None, None]
+            mips[chunk_pos] = mip
+            if len(mips) > self.max_size / (scale * scale):
+                mips.popitem(last=False)
+        else:
+            mips.move_to_end(chunk_pos)
+
+        if mip[0] != chunk.revision:
+            source = self.get(chunk_pos, scale * 2)
+            size = (max(1, source.get_width() // 2), max(1, source.get_height() // 2))
+            if mip[1] is None:
+                mip[1] = pygame.transform.smoothscale(source, size)
+            else:
+                pygame.transform.smoothscale(source, size, mip[1])
+            mip[0] = chunk.revision
+        return mip[1]
+
+    def oversized_type_ids(self):
+        """Return the stored ids (type id + 1) of tile types with sprites larger than a tile, and the overdraw margin."""
+        type_names = self.tile_map.type_names
+        if self.oversized_types[:2] != (len(type_names), self.tile_size):
+            type_ids, margin = [], 0
+            for type_id, type_name in enumerate(type_names):
+                extent = max(self.sprite_cache.assets.get_size(type_name))
+                if extent > self.tile_size:
+                    type_ids.append(type_id + 1)
+                    margin = max(margin, -(-extent // self.tile_size) - 1)
+            self.oversized_types = (len(type_names), self.tile_size, np.array(type_ids, np.uint16), margin)
+        return self.oversized_types[2], self.oversized_types[3]
+
+    def overdraw_margin(self):
+        """How many tiles an oversized sprite can reach past its own tile (right and down)."""
+        return self.oversized_type_ids()[1]
+
+    def oversized_tiles(self, chunk_pos):
+        """Return (type_name, rotate, x, y) for each tile of a chunk whose sprite is larger than a tile."""
+        chunk = self.tile_map.chunks.get(chunk_pos)
+        if chunk is None:
+            self.oversized.pop(chunk_pos, None)
+            return []
+
+        cached = self.oversized.get(chunk_pos)
+        if cached is not None and cached[0] == chunk.revision:
+            return cached[1]
+
+        type_ids, _ = self.oversized_type_ids()
+        tiles = []
+        if type_ids.size:
+            size = self.tile_map.chunk_size
+            types, rotations = self.tile_map.chunk_views(chunk)
+            for local_y, local_x in np.argwhere(np.isin(types, type_ids)).tolist():
+                tiles.append((
+                    self.tile_map.type_names[types[local_y, local_x] - 1], int(rotations[local_y, local_x]),
+                    chunk_pos[0] * size + local_x, chunk_pos[1] * size + local_y
+                ))
+        self.oversized[chunk_pos] = [chunk.revision, tiles]
+        return tiles
+
+    def bake(self, chunk, surface):
+        """Draw every tile of a chunk onto its surface."""
+        surface.fill(EDITOR_BACKGROUND_COLOR)
+        size = self.tile_map.chunk_size
+        type_names = self.tile_map.type_names
+        types = chunk.types
+        rotations = chunk.rotations
+
+        for index in range(size * size):
+            if types[index]:
+                local_y, local_x = divmod(index, size)
+                surface.blit(
+                    self.sprite_cache.get(type_names[types[index] - 1], rotations[index]),
+                    (local_x * self.tile_size, local_y * self.tile_size)
+                )
+        self.bakes += 1
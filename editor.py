@@ -1,12 +1,24 @@
 import pygame
+import numpy as np
 import sys
 import os
-import json
+import struct
 import time
 import math
-from text import Text
+from text import Text, render_text
 from Settings import *
-from utils import load_assets
+from utils import load_assets, FrameStats
+from tilemap import TileMap
+from sprite_cache import SpriteCache
+from chunk_renderer import ChunkRenderer
+from minimap import Minimap
+from map_loader import MapLoadJob
+from map_saver import MapSaveJob
+from map_journal import MapJournal
+from history import EditHistory
+from offgrid_layers import LayerBuckets
+from offgrid_store import OffgridStore, offgrid_id
+from map_format import load_map_file, BINARY_MAP_EXTENSION, JSON_MAP_EXTENSION
 
 
 class Editor:
@@ -25,13 +37,27 @@ class Editor:
         
         # Game state
         self.tile_size = TILE_SIZE
-        self.tile_map = {}  # key: "x;y", value: {pos, type, rotate, size, selected}
-        self.offgrid = {}  # key: "asset_num;layer" value: {pos, layer, type, rotate, size, selected}
-        self.offgrid_rects = {}  # key "asset_num;layer" value: rect
-        self.window_offgrid_rects = {}
+        self.tile_map = TileMap()
+        self.selected_tiles = set()  # (x, y) positions of selected grid tiles
+        self.selected_offgrid = set()  # IDs of selected off-grid objects
+        self.selected_region = None  # (x0, y0, x1, y1) tile rectangle picked with a marquee drag
+        self.marquee = None  # [start tile, current tile] while a marquee is dragged
+        self.offgrid_layers = LayerBuckets()  # off-grid object IDs by layer, in drawing order
+        self.history = EditHistory()  # undo/redo of edit deltas
         
-        # Assets
-        self.game_assets = load_assets()
+        # Show loading screen while the first assets are decoded
+        self.show_loading_screen()
+        
+        # Assets (decoded on first use; the asset pack is rebuilt here if it is stale)
+        self.game_assets = load_assets(self.draw_loading_progress)
+        self.sprite_cache = SpriteCache(self.game_assets)
+        self.game_assets.eviction_listeners.append(self.sprite_cache.drop_asset)
+        self.offgrid = OffgridStore(self.game_assets.get_size)  # off-grid objects by stable ID
+        self.chunk_renderer = ChunkRenderer(self.tile_map, self.sprite_cache, self.tile_size)
+        self.minimap = Minimap(self.tile_map, self.game_assets)
+        self.build_palette()
+        first_index, last_index = self.visible_palette_range()
+        self.game_assets.preload(self.palette_keys[first_index:last_index], self.draw_loading_progress)
         if len(self.game_assets) > 0 :
             self.default_asset_key = [list(self.game_assets.keys())[0], False]
         else :
@@ -40,9 +66,39 @@ class Editor:
         self.camera_scroll = [0, 0]
         self.shifting = False
         self.left_clicking = False
+        self.minimap_dragging = False
         
-        # Show loading screen
-        self.show_loading_screen()
+        # Render statistics
+        self.render_stats = {"drawn": 0, "culled": 0, "chunks": 0}
+        
+        # Panels: name -> (render method, surface, screen rect)
+        self.panels = {
+            "editor": (self.render_tiles, self.editor_surface, self.editor_rect),
+            "tilemap": (self.render_tilemap_assets, self.tilemap_window_surf, self.tilemap_window_rect),
+            "tile info": (self.render_tiles_data, self.tile_info_window, self.tile_info_rect),
+            "assets": (self.render_assets, self.assets_window, self.assets_window_rect),
+            "settings": (self.render_settings, self.settings_window, self.settings_window_rect)
+        }
+        self.dirty_panels = set(self.panels)
+        self.full_redraw = True
+        
+        # Frame pacing
+        self.clock = pygame.time.Clock()
+        self.frame_stats = FrameStats()
+        self.last_stats_report = 0
+        
+        # Background map loading/saving and the status line of the settings panel
+        self.map_loader = None
+        self.map_saver = None
+        self.status_text = ""
+        
+        # Autosave: edits counted by touch_tile/touch_offgrid/edit_region/apply_step since the last save
+        self.unsaved_edits = 0
+        self.last_save_time = time.monotonic()
+        
+        # Edit journal of the open map (MAP_JOURNAL); created when a map is loaded or saved
+        self.journal = None
+        self.last_journal_flush = time.monotonic()
 
     def init_main_screen(self):
         """Initialize the main display window."""
@@ -57,9 +113,21 @@ class Editor:
         self.editor_surface = pygame.Surface((self.editor_width, self.editor_height))
         self.editor_rect = pygame.Rect(10, 10, self.editor_width, self.editor_height)
         
-        # Scaled surface for zoomed-in view
-        self.scaled_width = self.editor_width // 2
-        self.scaled_height = self.editor_height // 2
+        # Scaled surface for the zoomed view
+        self.set_zoom(0)
+    
+    def set_zoom(self, zoom_level):
+        """Switch to one of the ZOOM_LEVELS.
+
+        Magnified levels draw the map 1:1 on a smaller scaled surface that is
+        scaled up to the editor; zoomed-out levels draw the map shrunk by
+        `map_scale` (from the chunk renderer's mips) on an editor-sized one.
+        """
+        zoom = ZOOM_LEVELS[zoom_level]
+        self.zoom_level = zoom_level
+        self.map_scale = min(zoom, 1)  # scaled surface pixels per map pixel
+        self.scaled_width = int(self.editor_width / max(zoom, 1))
+        self.scaled_height = int(self.editor_height / max(zoom, 1))
         self.scaled_surface = pygame.Surface((self.scaled_width, self.scaled_height))
     
     def init_tilemap_window(self):
@@ -73,8 +141,11 @@ class Editor:
             self.editor_width + 20, 10, 
             self.tilemap_window_width, self.tilemap_window_height
         )
-        self.tiles_rects = {}
         self.tilemap_window_scroll = 0
+        
+        # List rows: thumbnail + name, one row per placed tile or off-grid object
+        self.tilemap_thumbnail_size = 25
+        self.tilemap_row_height = self.tilemap_thumbnail_size + 15
     
     def init_tile_info_window(self):
         """Initialize the tile information window."""
@@ -117,12 +188,17 @@ class Editor:
         self.assets_resolution = (self.editor_width, self.assets_height)
         self.assets_window = pygame.Surface(self.assets_resolution)
         self.assets_font = pygame.font.Font(FONT_PATH, 16)
-        self.assets_info = {}
         self.assets_window_rect = pygame.Rect(
             10, self.editor_height + 20, 
             self.assets_width, self.assets_height
         )
         self.assets_window_scroll = 0
+        
+        # Palette grid: 50x50 thumbnails with a name label under each
+        self.palette_start_x = 25
+        self.palette_thumbnail_size = 50
+        self.palette_cell_width = self.palette_thumbnail_size + 20
+        self.palette_cell_height = self.palette_thumbnail_size + 40
     
     def init_settings_window(self):
         """Initialize the settings window."""
@@ -133,7 +209,7 @@ class Editor:
         self.settings_font = pygame.font.Font(FONT_PATH, 16)
         self.settings_buttons = {}
         
-        self.buttons_names = ["Show Grid", "map name txt", "save", "load", "On grid"]
+        self.buttons_names = ["Show Grid", "map name txt", "save", "load", "On grid", "Show Minimap"]
         self.settings_window_rect = pygame.Rect(
             self.assets_width + 20,
             self.tilemap_window_height + self.tile_info_height + 27,
@@ -158,6 +234,12 @@ class Editor:
                     False
                 ]
             start_y += increasing_rate
+        self.settings_buttons["Show Minimap"][1] = True
+        
+        # Minimap in the editor's top-right corner (screen coordinates)
+        self.minimap_rect = pygame.Rect(
+            self.editor_rect.right - MINIMAP_SIZE[0] - 10, self.editor_rect.top + 10, *MINIMAP_SIZE
+        )
     
     def show_loading_screen(self):
         """Display the initial loading screen."""
@@ -184,16 +266,76 @@ class Editor:
         self.main_screen.blit(version_text, (10, self.screen_height - 30))
         
         pygame.display.flip()
-        time.sleep(3)  # This seems unnecessary, consider removing
+    
+    def draw_loading_progress(self, done, total):
+        """Draw the asset loading progress bar on the loading screen."""
+        pygame.event.pump()
+        bar_rect = pygame.Rect(self.screen_width/2 - 200, self.screen_height - 90, 400, 16)
+        text_rect = pygame.Rect(bar_rect.left, bar_rect.bottom + 6, bar_rect.width, 24)
+        
+        self.main_screen.fill(SCREEN_COLOR, text_rect)
+        pygame.draw.rect(self.main_screen, WINDOWS_COLOR, bar_rect)
+        pygame.draw.rect(
+            self.main_screen, SELECT_COLOR,
+            pygame.Rect(bar_rect.left, bar_rect.top, bar_rect.width * done / max(total, 1), bar_rect.height)
+        )
+        
+        progress_text = render_text(self.settings_font, f"Loading assets {done}/{total}", True, FONT_COLOR_LIGHT)
+        self.main_screen.blit(
+            progress_text,
+            (self.screen_width/2 - progress_text.get_width()/2, text_rect.top)
+        )
+        pygame.display.update([bar_rect, text_rect])
 
     def run(self):
         """Main game loop."""
         while True:
-            self.handle_events()
-            self.change_offgrid_location()
-            self.render()
-            pygame.display.flip()
+            events = self.wait_for_events()
+            frame_start = time.perf_counter()
+            
+            self.handle_events(events)
             self.update_buttons()
+            self.change_offgrid_location()
+            self.update_map_loading()
+            self.update_map_saving()
+            self.update_journal()
+            self.update_history()
+            updated_rects = self.render()
+            if updated_rects:
+                pygame.display.update(updated_rects)
+            
+            self.frame_stats.add((time.perf_counter() - frame_start) * 1000)
+            self.report_frame_stats()
+            self.clock.tick(TARGET_FPS)
+    
+    def wait_for_events(self):
+        """Return pending events, blocking for input while the editor is idle."""
+        if self.dirty_panels or self.left_clicking or self.map_loader is not None or self.map_saver is not None:
+            return pygame.event.get()
+        
+        # Nothing to redraw and no drag in progress: sleep until input arrives
+        event = pygame.event.wait(IDLE_WAIT_TIMEOUT)
+        return [event] + pygame.event.get()
+    
+    def report_frame_stats(self):
+        """Show the average and peak frame times in the window caption once a second (with SHOW_FRAME_STATS)."""
+        if not SHOW_FRAME_STATS:
+            return
+        now = pygame.time.get_ticks()
+        if now - self.last_stats_report >= 1000:
+            self.last_stats_report = now
+            pygame.display.set_caption(
+                f"SA level editor - frame avg {self.frame_stats.average():.1f} ms"
+                f" / peak {self.frame_stats.peak():.1f} ms"
+            )
+    
+    def invalidate(self, *panels):
+        """Mark panels to be re-rendered on the next frame (all panels if none are given)."""
+        self.dirty_panels.update(panels or self.panels)
+    
+    def invalidate_map(self):
+        """Mark the panels that show map contents or the selection."""
+        self.invalidate("editor", "tilemap", "tile info")
     
     def update_buttons(self):
         """Update button states and handle button actions."""
@@ -201,23 +343,27 @@ class Editor:
             if button_name == "save" and button[1]:
                 self.save_map()
                 button[1] = False
+                self.invalidate("settings")
             elif button_name == "load" and button[1]:
                 self.load_map()
                 button[1] = False
+                self.invalidate("settings")
             elif button_name.endswith('txt'):
-                button.update()
+                if button.update():
+                    self.invalidate("settings")
             elif button_name == "On grid" :
                 self.default_asset_key[1] = button[1]
         
         for option_name, option in self.tiles_options_rects.items():
             if option_name.endswith('txt'):
-                option.update()
+                if option.update():
+                    self.invalidate("tile info")
             else:
                 pass
 
-    def handle_events(self):
+    def handle_events(self, events):
         """Process all user input events."""
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -242,13 +388,32 @@ class Editor:
         if event.type == pygame.MOUSEBUTTONUP:
             if event.button == 1 :
                 self.left_clicking = False
+                self.minimap_dragging = False
+                if self.marquee is not None:
+                    self.finish_marquee()
+        
+        if event.type == pygame.MOUSEMOTION:
+            if self.minimap_dragging:
+                self.jump_to_minimap(*event.pos)
+            if self.marquee is not None:
+                self.marquee[1] = self.get_tile_coords(*event.pos)
+            # The asset preview follows the mouse while it is over the editor
+            previous_pos = (event.pos[0] - event.rel[0], event.pos[1] - event.rel[1])
+            if self.editor_rect.collidepoint(event.pos) or self.editor_rect.collidepoint(previous_pos):
+                self.invalidate("editor")
     
     def handle_left_click(self):
         """Handle left mouse button clicks."""
         mouse_x, mouse_y = pygame.mouse.get_pos()
         
         if self.editor_rect.collidepoint(mouse_x, mouse_y):
-            self.handle_editor_click(mouse_x, mouse_y)
+            if self.settings_buttons["Show Minimap"][1] and self.minimap_rect.collidepoint(mouse_x, mouse_y):
+                self.minimap_dragging = True
+                self.jump_to_minimap(mouse_x, mouse_y)
+            elif pygame.key.get_mods() & pygame.KMOD_CTRL:
+                self.start_marquee(mouse_x, mouse_y)
+            else:
+                self.handle_editor_click(mouse_x, mouse_y)
         elif self.assets_window_rect.collidepoint(mouse_x, mouse_y):
             self.handle_assets_click(mouse_x, mouse_y)
         elif self.tilemap_window_rect.collidepoint(mouse_x, mouse_y):
@@ -263,22 +428,17 @@ class Editor:
     def handle_editor_click(self, mouse_x, mouse_y):
         """Handle clicks in the editor area."""
         scaled_x, scaled_y = self.get_scaled_coords(mouse_x, mouse_y)
-        tile_x = int(scaled_x / self.tile_size)
-        tile_y = int(scaled_y / self.tile_size)
-        pos_tiles = (tile_x, tile_y)
-        tile_key = f"{pos_tiles[0]};{pos_tiles[1]}"
+        pos_tiles = self.get_tile_coords(mouse_x, mouse_y)
 
         if self.default_asset_key[1]:
-            if tile_key in self.tile_map:
-                self.select_tile(tile_key)
+            if pos_tiles in self.tile_map:
+                self.select_tile(pos_tiles)
             else:
-                self.add_tile(pos_tiles, tile_key)
+                self.add_tile(pos_tiles)
         else :
             if self.default_asset_key[0] == None :
-                for rect_key in self.offgrid_rects :
-                    rect = self.offgrid_rects[rect_key]
-                    if rect.collidepoint(scaled_x,scaled_y) :
-                        self.select_offgrid(rect_key)
+                for offgrid_key in self.offgrid.query_point(scaled_x, scaled_y) :
+                    self.select_offgrid(offgrid_key)
             else :
                 self.add_offgrid((scaled_x,scaled_y))
     
@@ -287,25 +447,41 @@ class Editor:
         local_x = mouse_x - self.assets_window_rect.x
         local_y = mouse_y - self.assets_window_rect.y
         
-        for key, rect in self.assets_info.items():
-            if rect.collidepoint(local_x, local_y):
-                if key == self.default_asset_key[0]:
-                    self.default_asset_key[0] = None
-                else:
-                    self.default_asset_key[0] = key
+        # Find the palette cell under the mouse; each cell's box starts 5px before its image
+        start_y = 20 + self.assets_window_scroll * ASSETS_SCROLL_SPEED
+        col, cell_x = divmod(local_x - self.palette_start_x + 5, self.palette_cell_width)
+        row, cell_y = divmod(local_y - start_y + 5, self.palette_cell_height)
+        if cell_x >= self.palette_thumbnail_size + 10 or cell_y >= self.palette_thumbnail_size + 33:
+            return
+        
+        index = int(row) * ASSETS_PER_ROW + int(col)
+        if 0 <= col < ASSETS_PER_ROW and 0 <= index < len(self.palette_keys):
+            key = self.palette_keys[index]
+            if key == self.default_asset_key[0]:
+                self.default_asset_key[0] = None
+            else:
+                self.default_asset_key[0] = key
+            self.invalidate("assets", "editor")
     
     def handle_tilemap_click(self, mouse_x, mouse_y):
         """Handle clicks in the tilemap window."""
         local_x = mouse_x - self.tilemap_window_rect.x
         local_y = mouse_y - self.tilemap_window_rect.y
         
-        for key, rect in self.tiles_rects.items():
-            if rect.collidepoint(local_x, local_y):
-                self.select_tile(key)
+        # Rows start 4px down and are separated by a 3px gap
+        row, row_y = divmod(local_y - 4 - self.tilemap_window_scroll, self.tilemap_row_height)
+        if row < 0 or row_y >= self.tilemap_thumbnail_size + 12:
+            return
+        if not 4 <= local_x < self.tilemap_window_resolution[0] - 6:
+            return
         
-        for key, rect in self.window_offgrid_rects.items():
-            if rect.collidepoint(local_x, local_y):
-                self.select_offgrid(key)
+        row = int(row)
+        if row < len(self.tile_map):
+            tile_x, tile_y, _, _ = next(self.tile_map.tiles_slice(row, row + 1))
+            self.select_tile((tile_x, tile_y))
+        elif row < len(self.tile_map) + len(self.offgrid):
+            offgrid_index = row - len(self.tile_map)
+            self.select_offgrid(next(self.offgrid_layers.keys_slice(offgrid_index, offgrid_index + 1)))
     
     def handle_tile_info_click(self, mouse_x, mouse_y):
         """Handle clicks in the tile info window."""
@@ -319,6 +495,7 @@ class Editor:
             else:
                 if option[0].collidepoint(local_x, local_y):
                     option[1] = not option[1]
+        self.invalidate("tile info")
     
     def handle_settings_click(self, mouse_x, mouse_y):
         """Handle clicks in the settings window."""
@@ -332,39 +509,38 @@ class Editor:
             else:
                 if button[0].collidepoint(local_x, local_y):
                     button[1] = not button[1]
+        self.invalidate("settings", "editor")
     
     def handle_middle_click(self):
-        """Handle middle mouse button clicks."""
-        pass  # Currently unused
+        """Handle middle mouse button clicks (bucket fill on the grid)."""
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        
+        if self.editor_rect.collidepoint(mouse_x, mouse_y) and self.default_asset_key[1]:
+            self.bucket_fill(self.get_tile_coords(mouse_x, mouse_y))
     
     def handle_right_click(self):
         """Handle right mouse button clicks."""
         mouse_x, mouse_y = pygame.mouse.get_pos()
         
-        if self.editor_rect.collidepoint(mouse_x, mouse_y):
+        if self.editor_rect.collidepoint(mouse_x, mouse_y) and not self.map_locked():
             scaled_x, scaled_y = self.get_scaled_coords(mouse_x, mouse_y)
-            tile_x = int(scaled_x / self.tile_size)
-            tile_y = int(scaled_y / self.tile_size)
-            tile_key = f"{tile_x};{tile_y}"
+            tile_x, tile_y = self.get_tile_coords(mouse_x, mouse_y)
             
-            if tile_key in self.tile_map:
-                del self.tile_map[tile_key]
+            if (tile_x, tile_y) in self.tile_map:
+                self.touch_tile(tile_x, tile_y)
+                self.tile_map.remove(tile_x, tile_y)
+                self.selected_tiles.discard((tile_x, tile_y))
+                self.invalidate_map()
 
-            # Create a list of keys to delete to avoid modifying dict during iteration
-            keys_to_delete = []
-            for rect_key, rect in self.offgrid_rects.items():
-                if rect.collidepoint(scaled_x, scaled_y):
-                    keys_to_delete.append(rect_key)
-            
-            # Delete the found keys
-            for key in keys_to_delete:
-                if key in self.offgrid:
-                    del self.offgrid[key]
-                if key in self.offgrid_rects:
-                    del self.offgrid_rects[key]
+            # Delete every off-grid object under the mouse
+            for key in self.offgrid.query_point(scaled_x, scaled_y):
+                self.touch_offgrid(key)
+                self.delete_offgrid(key)
+                self.invalidate_map()
 
         if self.assets_window_rect.collidepoint(mouse_x, mouse_y):
             self.default_asset_key[0] = None
+            self.invalidate("assets", "editor")
 
         if self.editor_rect.collidepoint(mouse_x, mouse_y):
             self.deselect_all()
@@ -393,6 +569,7 @@ class Editor:
                 self.tilemap_window_scroll = min(min_scroll, self.tilemap_window_scroll + 5)
             elif direction == 5:  # Scroll down
                 self.tilemap_window_scroll = max(max_scroll, self.tilemap_window_scroll - 5)
+            self.invalidate("tilemap")
         
         elif self.assets_window_rect.collidepoint(mouse_x, mouse_y):
             rows = math.ceil(len(self.game_assets) / ASSETS_PER_ROW)
@@ -405,6 +582,26 @@ class Editor:
                 self.assets_window_scroll = min(min_scroll, self.assets_window_scroll + 5)
             elif direction == 5:  # Scroll down
                 self.assets_window_scroll = max(max_scroll, self.assets_window_scroll - 5)
+            self.invalidate("assets")
+        
+        elif self.editor_rect.collidepoint(mouse_x, mouse_y):
+            self.change_zoom(-1 if direction == 4 else 1)
+    
+    def change_zoom(self, step):
+        """Move `step` levels through ZOOM_LEVELS, keeping the map under the mouse in place."""
+        zoom_level = min(max(self.zoom_level + step, 0), len(ZOOM_LEVELS) - 1)
+        if zoom_level == self.zoom_level:
+            return
+        
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        before_x, before_y = self.get_scaled_coords(mouse_x, mouse_y)
+        self.set_zoom(zoom_level)
+        after_x, after_y = self.get_scaled_coords(mouse_x, mouse_y)
+        # The camera stays on whole tiles so the grid and the placement preview line up
+        self.camera_scroll[0] += round((after_x - before_x) / self.tile_size) * self.tile_size
+        self.camera_scroll[1] += round((after_y - before_y) / self.tile_size) * self.tile_size
+        self.set_status(f"Zoom {ZOOM_LEVELS[zoom_level]:g}x")
+        self.invalidate("editor")
     
     def handle_keyboard_events(self, event):
         """Handle keyboard input events."""
@@ -417,231 +614,422 @@ class Editor:
     def handle_key_presses(self, event):
         """Handle key press events."""
         # Handle text input for text boxes
+        typing = False
         for button in self.settings_buttons:
             if button.endswith("txt"):
                 button_obj = self.settings_buttons[button]
                 if button_obj.stats:
                     button_obj.type_txt(event, "str")
+                    self.invalidate("settings")
+                    typing = True
         
         for option in self.tiles_options_rects:
             if option.endswith("txt"):
                 option_obj = self.tiles_options_rects[option]
                 if option_obj.stats:
                     option_obj.type_txt(event, "int")
+                    self.invalidate("tile info")
+                    typing = True
         
-        # Handle editor navigation
-        if self.editor_rect.collidepoint(*pygame.mouse.get_pos()):
+        # Handle editor navigation and edits (not while the keys go to a text box)
+        if not typing and self.editor_rect.collidepoint(*pygame.mouse.get_pos()):
+            self.invalidate("editor")
+            # Zoomed out, a step covers as much of the screen as at 1x
+            scroll_step = self.tile_size * int(TILE_MAP_SCROLL_SPEED / self.map_scale)
             if event.key == pygame.K_w:
-                self.camera_scroll[1] += self.tile_size * int(TILE_MAP_SCROLL_SPEED)
+                self.camera_scroll[1] += scroll_step
             elif event.key == pygame.K_s:
-                self.camera_scroll[1] -= self.tile_size * int(TILE_MAP_SCROLL_SPEED)
+                self.camera_scroll[1] -= scroll_step
             elif event.key == pygame.K_a:
-                self.camera_scroll[0] += self.tile_size * int(TILE_MAP_SCROLL_SPEED)
+                self.camera_scroll[0] += scroll_step
             elif event.key == pygame.K_d:
-                self.camera_scroll[0] -= self.tile_size * int(TILE_MAP_SCROLL_SPEED)
+                self.camera_scroll[0] -= scroll_step
             elif event.key == pygame.K_r:
                 self.rotate_selected_tiles()
+            elif event.key in (pygame.K_DELETE, pygame.K_BACKSPACE):
+                self.delete_selection()
+            elif event.key == pygame.K_e:
+                self.fill_selected_region()
+            elif event.key == pygame.K_LEFT:
+                self.move_selected_region(-1, 0)
+            elif event.key == pygame.K_RIGHT:
+                self.move_selected_region(1, 0)
+            elif event.key == pygame.K_UP:
+                self.move_selected_region(0, -1)
+            elif event.key == pygame.K_DOWN:
+                self.move_selected_region(0, 1)
         
         # Handle special keys
         if event.key == pygame.K_LSHIFT:
             self.shifting = True
+        elif event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+            if event.mod & pygame.KMOD_SHIFT:
+                self.redo()
+            else:
+                self.undo()
+        elif event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+            self.redo()
         elif event.key == pygame.K_t:
             self.save_map()
         elif event.key == pygame.K_y:
             self.load_map()
         elif event.key == pygame.K_l:
-            offgrid_keys = list(self.offgrid.keys())
-            for offgrid_key in offgrid_keys:
-                offgrid = self.offgrid[offgrid_key]
-                if offgrid['selected'] :
-                    for option in self.tiles_options_rects :
-                        if option.endswith("txt") and option[:-4] == "layer" :
-                            text_bar = self.tiles_options_rects[option]
+            for offgrid_key in sorted(self.selected_offgrid):
+                for option in self.tiles_options_rects :
+                    if option.endswith("txt") and option[:-4] == "layer" :
+                        text_bar = self.tiles_options_rects[option]
+                        if text_bar.text.lstrip("-").isdigit():
                             self.change_layer(offgrid_key,int(text_bar.text))
         elif event.key == pygame.K_f:
-            offgrid_keys = list(self.offgrid.keys())
-            for offgrid_key in offgrid_keys:
-                offgrid = self.offgrid[offgrid_key]
-                if offgrid['selected'] :
-                    for option in self.tiles_options_rects :
-                        if option.endswith("txt") and option[:-4] == "size" :
-                            text_bar = self.tiles_options_rects[option]
-                            self.change_size(float(text_bar.text))
+            if self.selected_offgrid:
+                for option in self.tiles_options_rects :
+                    if option.endswith("txt") and option[:-4] == "size" :
+                        text_bar = self.tiles_options_rects[option]
+                        try:
+                            new_size = float(text_bar.text)
+                        except ValueError:
+                            continue
+                        # The int box takes a sign for layers, but an object needs a positive size
+                        if new_size > 0:
+                            self.change_size(new_size)
+                        else:
+                            self.set_status("Size must be greater than 0")
     
     def rotate_selected_tiles(self):
-        """Rotate all selected tiles."""
-        for tile in self.tile_map.values():
-            if tile['selected']:
-                tile['rotate'] += 1
-
-        for offgrid in self.offgrid.values():
-            if offgrid['selected']:
-                offgrid['rotate'] += 1
+        """Rotate all selected tiles and off-grid objects by a quarter turn, as one undo step."""
+        if self.map_locked():
+            return
+        # Tiles selected on their own inside the selected region turn with it, once
+        tile_positions = [
+            (tile_x, tile_y) for tile_x, tile_y in self.selected_tiles
+            if self.selected_region is None or not self.in_selected_region(tile_x, tile_y)
+        ]
+        if self.selected_region is not None:
+            self.touch_region(self.selected_region)
+        for tile_x, tile_y in tile_positions:
+            self.touch_tile(tile_x, tile_y)
+        for offgrid_key in self.selected_offgrid:
+            self.touch_offgrid(offgrid_key)
+        
+        if self.selected_region is not None:
+            self.tile_map.rotate_region(*self.selected_region)
+        for tile_x, tile_y in tile_positions:
+            self.tile_map.rotate(tile_x, tile_y)
+        self.offgrid.rotate_by(self.selected_offgrid_ids())
+        self.history.close(self.tile_map, self.offgrid)
+        self.invalidate_map()
 
     def change_offgrid_location(self):
-        if self.left_clicking :
-            for key in self.offgrid :
-                offgrid = self.offgrid[key]
-                rect = self.offgrid_rects[key]
-                
-                mouse_x = pygame.mouse.get_pos()[0]
-                mouse_y = pygame.mouse.get_pos()[1]
-                
-                scaled_x = (self.scaled_width / self.editor_width) * mouse_x
-                scaled_y = (self.scaled_height / self.editor_height) * mouse_y
-                if offgrid['selected']:
-                    img_size = (self.game_assets[offgrid['type']].get_width(),self.game_assets[offgrid['type']].get_height())
-                    offgrid['pos'] = (scaled_x - img_size[0] + 2,scaled_y - img_size[1] + 1)
-                    rect.topleft = (scaled_x - img_size[0] + 2,scaled_y - img_size[1] + 1)
+        """Drag the selected off-grid objects with the mouse."""
+        if self.left_clicking and not self.minimap_dragging :
+            if not self.selected_offgrid or self.map_locked():
+                return
+            selected_ids = self.selected_offgrid_ids()
+            
+            mouse_x = pygame.mouse.get_pos()[0]
+            mouse_y = pygame.mouse.get_pos()[1]
+            
+            scaled_x = (self.scaled_width / self.editor_width) * mouse_x / self.map_scale
+            scaled_y = (self.scaled_height / self.editor_height) * mouse_y / self.map_scale
+            type_ids = self.offgrid.type_id[selected_ids]
+            new_x = scaled_x - self.offgrid.type_widths[type_ids] + 2
+            new_y = scaled_y - self.offgrid.type_heights[type_ids] + 1
+            changed = (self.offgrid.x[selected_ids] != new_x) | (self.offgrid.y[selected_ids] != new_y)
+            if changed.any():
+                for offgrid_key in selected_ids[changed].tolist():
+                    self.touch_offgrid(offgrid_key)
+                self.offgrid.move(selected_ids[changed], new_x[changed], new_y[changed])
+                self.invalidate_map()
     
     def get_scaled_coords(self, mouse_x, mouse_y):
         """Convert screen coordinates to scaled editor coordinates."""
-        scaled_x = ((mouse_x - 10) * self.scaled_width / self.editor_width) - self.camera_scroll[0]
-        scaled_y = ((mouse_y - 10) * self.scaled_height / self.editor_height) - self.camera_scroll[1]
+        scaled_x = ((mouse_x - 10) * self.scaled_width / self.editor_width / self.map_scale) - self.camera_scroll[0]
+        scaled_y = ((mouse_y - 10) * self.scaled_height / self.editor_height / self.map_scale) - self.camera_scroll[1]
         return scaled_x, scaled_y
     
-    def add_tile(self, tile_pos, tile_key):
+    def map_to_view(self, map_x, map_y):
+        """Convert map coordinates to scaled surface coordinates."""
+        return (map_x + self.camera_scroll[0]) * self.map_scale, (map_y + self.camera_scroll[1]) * self.map_scale
+    
+    def get_tile_coords(self, mouse_x, mouse_y):
+        """Convert screen coordinates to the grid tile under them."""
+        scaled_x, scaled_y = self.get_scaled_coords(mouse_x, mouse_y)
+        return math.floor(scaled_x / self.tile_size), math.floor(scaled_y / self.tile_size)
+    
+    def jump_to_minimap(self, mouse_x, mouse_y):
+        """Center the editor view on the map position under the mouse in the minimap."""
+        tile_x, tile_y = self.minimap.to_tiles(mouse_x - self.minimap_rect.x, mouse_y - self.minimap_rect.y)
+        visible_rect = self.get_visible_rect()
+        self.camera_scroll[0] = -round(tile_x - visible_rect.width / self.tile_size / 2) * self.tile_size
+        self.camera_scroll[1] = -round(tile_y - visible_rect.height / self.tile_size / 2) * self.tile_size
+        self.invalidate("editor")
+    
+    def start_marquee(self, mouse_x, mouse_y):
+        """Start dragging a selection rectangle over the grid."""
+        self.deselect_all()
+        tile_pos = self.get_tile_coords(mouse_x, mouse_y)
+        self.marquee = [tile_pos, tile_pos]
+    
+    def finish_marquee(self):
+        """Select the grid region covered by the selection rectangle."""
+        (start_x, start_y), (end_x, end_y) = self.marquee
+        self.marquee = None
+        self.selected_region = (
+            min(start_x, end_x), min(start_y, end_y), max(start_x, end_x) + 1, max(start_y, end_y) + 1
+        )
+        x0, y0, x1, y1 = self.selected_region
+        self.set_status(f"Selected {x1 - x0}x{y1 - y0} tiles ({self.tile_map.count_region(*self.selected_region)} placed)")
+        self.invalidate_map()
+    
+    def edit_region(self, region, operation, *args):
+        """Run a bulk tile operation that changes only `region` (x0, y0, x1, y1) as a single undo step.
+
+        The region is recorded as arrays for undo and the journal instead of
+        tile by tile, so the cost stays with the chunk array operations.
+        """
+        self.touch_region(region)
+        result = operation(*args)
+        self.history.close(self.tile_map, self.offgrid)
+        self.prune_selection()
+        self.invalidate_map()
+        return result
+    
+    def delete_selection(self):
+        """Delete the selected region, tiles and off-grid objects."""
+        if self.map_locked():
+            return
+        if self.selected_region is not None:
+            removed = self.edit_region(self.selected_region, self.tile_map.clear_region, *self.selected_region)
+            self.set_status(f"Deleted {removed} tiles")
+        
+        for tile_x, tile_y in self.selected_tiles:
+            self.touch_tile(tile_x, tile_y)
+            self.tile_map.remove(tile_x, tile_y)
+        self.selected_tiles.clear()
+        
+        for offgrid_key in list(self.selected_offgrid):
+            self.touch_offgrid(offgrid_key)
+            self.delete_offgrid(offgrid_key)
+        self.invalidate_map()
+    
+    def fill_selected_region(self):
+        """Fill the selected region with the selected asset."""
+        if self.selected_region is not None and self.default_asset_key[0] is not None and not self.map_locked():
+            self.edit_region(
+                self.selected_region, self.tile_map.fill_region, *self.selected_region, self.default_asset_key[0]
+            )
+    
+    def bucket_fill(self, tile_pos):
+        """Fill the tiles connected to `tile_pos` that share its type (or emptiness) with the selected asset.
+
+        The fill stays inside the selected region if the tile is in it, and
+        within BUCKET_FILL_RADIUS tiles of it otherwise.
+        """
+        if self.default_asset_key[0] is None or self.map_locked():
+            return
+        tile_x, tile_y = tile_pos
+        current = self.tile_map.get(tile_x, tile_y)
+        if current is not None and current[0] == self.default_asset_key[0]:
+            return
+        
+        if self.selected_region is not None and self.is_tile_selected(tile_x, tile_y):
+            bounds = self.selected_region
+        else:
+            bounds = (
+                tile_x - BUCKET_FILL_RADIUS, tile_y - BUCKET_FILL_RADIUS,
+                tile_x + BUCKET_FILL_RADIUS + 1, tile_y + BUCKET_FILL_RADIUS + 1
+            )
+        left, top, mask = self.tile_map.connected_region(tile_x, tile_y, *bounds)
+        height, width = mask.shape
+        self.edit_region(
+            (left, top, left + width, top + height),
+            self.tile_map.fill_region, left, top, left + width, top + height, self.default_asset_key[0], 0, mask
+        )
+        self.set_status(f"Filled {int(np.count_nonzero(mask))} tiles")
+    
+    def move_selected_region(self, dx, dy):
+        """Move the tiles of the selected region (and the selection) by (dx, dy) tiles."""
+        if self.selected_region is None or self.map_locked():
+            return
+        x0, y0, x1, y1 = self.selected_region
+        # The step covers both where the tiles were and where they land
+        self.edit_region(
+            (min(x0, x0 + dx), min(y0, y0 + dy), max(x1, x1 + dx), max(y1, y1 + dy)),
+            self.tile_map.move_region, x0, y0, x1, y1, dx, dy
+        )
+        self.selected_region = (x0 + dx, y0 + dy, x1 + dx, y1 + dy)
+    
+    def add_tile(self, tile_pos):
         """Add a new tile at the given position."""
         self.deselect_all()
         
-        if self.default_asset_key[0] is not None:
-            self.tile_map[tile_key] = {
-                "pos": tile_pos,
-                "type": self.default_asset_key[0],
-                "rotate": 0,
-                'selected': True
-            }
+        if self.default_asset_key[0] is not None and not self.map_locked():
+            self.touch_tile(tile_pos[0], tile_pos[1])
+            self.tile_map.set(tile_pos[0], tile_pos[1], self.default_asset_key[0])
+            self.selected_tiles.add(tuple(tile_pos))
+            self.invalidate_map()
     
     def add_offgrid(self, offgrid_tile_pos):
         """Add a new off-grid tile at the given position."""
         self.deselect_all()
         
-        asset_num = len(self.offgrid)
-        if self.default_asset_key[0] is not None:
-            offgrid_key = f"{asset_num};0"
-            
-            if offgrid_key in self.offgrid:
-                self.select_offgrid(offgrid_key)
-            else:
-                self.offgrid[offgrid_key] = {
-                    'pos': (offgrid_tile_pos[0] - 6, offgrid_tile_pos[1] - 8),
-                    'layer': 0,
-                    'type': self.default_asset_key[0],
-                    'rotate': 0,
-                    'size': 1,
-                    'selected': True
-                }
-                
-                self.offgrid_rects[offgrid_key] = pygame.Rect(
-                    offgrid_tile_pos[0] - 6, offgrid_tile_pos[1] - 8,
-                    self.game_assets[self.default_asset_key[0]].get_width(),
-                    self.game_assets[self.default_asset_key[0]].get_height()
-                )
+        if self.default_asset_key[0] is not None and not self.map_locked():
+            offgrid_key = self.offgrid.new_id()
+            self.touch_offgrid(offgrid_key)
+            self.place_offgrid(offgrid_key, {
+                'pos': (offgrid_tile_pos[0] - 6, offgrid_tile_pos[1] - 8),
+                'layer': 0,
+                'type': self.default_asset_key[0],
+                'rotate': 0,
+                'size': 1
+            })
+            self.selected_offgrid.add(offgrid_key)
+            self.invalidate_map()
     
     def deselect_all(self):
         """Deselect all tiles and off-grid objects."""
-        for tile in self.tile_map.values():
-            tile["selected"] = False
-        
-        for offgrid in self.offgrid.values():
-            offgrid["selected"] = False
+        self.selected_tiles.clear()
+        self.selected_offgrid.clear()
+        self.selected_region = None
+        self.invalidate_map()
     
-    def select_tile(self, tile_key):
+    def select_tile(self, tile_pos):
         """Select or deselect a tile."""
         if not self.shifting:
             self.deselect_all()
             
-        if tile_key in self.tile_map:
-            self.tile_map[tile_key]["selected"] = not self.tile_map[tile_key]["selected"]
+        if tile_pos in self.tile_map:
+            if tile_pos in self.selected_tiles:
+                self.selected_tiles.discard(tile_pos)
+            else:
+                self.selected_tiles.add(tile_pos)
+            self.invalidate_map()
     
     def select_offgrid(self, offgrid_key):
         """Select or deselect an off-grid object."""
         if not self.shifting:
             self.deselect_all()
             
-        self.offgrid[offgrid_key]["selected"] = not self.offgrid[offgrid_key]["selected"]
+        if offgrid_key in self.selected_offgrid:
+            self.selected_offgrid.discard(offgrid_key)
+        else:
+            self.selected_offgrid.add(offgrid_key)
+        self.invalidate_map()
 
     def change_layer(self,offgrid_key,new_layer_num) :
-        # 1. Get the original offgrid object
-        offgrid = self.offgrid[offgrid_key]
-        
-        # 2. Create new key with the new layer number
-        asset_num = offgrid_key.split(';')[0]  # Get the part before ;
-        new_key = f"{asset_num};{new_layer_num}"
-        
-        # 3. Create the updated offgrid object with new layer
-        updated_offgrid = {
-            'pos': offgrid['pos'],
-            'layer': new_layer_num,
-            'type': offgrid['type'],
-            'rotate': offgrid['rotate'],
-            'size': offgrid['size'],
-            'selected': offgrid['selected']
-        }
-        
-        # 4. Remove the old entry and add the new one
-        del self.offgrid[offgrid_key]
-        self.offgrid[new_key] = updated_offgrid
-        
-        # 5. Also update the offgrid_rects dictionary if it exists
-        if offgrid_key in self.offgrid_rects:
-            self.offgrid_rects[new_key] = self.offgrid_rects[offgrid_key]
-            del self.offgrid_rects[offgrid_key]
-        
-        # 6. Reorder all offgrid objects by layer (optional)
-        max_layer = max((grid['layer'] for grid in self.offgrid.values()), default=0)
-        
-        new_arranged_offgrid = {}
-        for layer_num in range(0, max_layer + 1):
-            for grid_key, grid_obj in self.offgrid.items():
-                if grid_obj["layer"] == layer_num:
-                    new_arranged_offgrid[grid_key] = grid_obj
-        
-        # 7. Update the offgrid dictionary (note: using = not ==)
-        self.offgrid = new_arranged_offgrid
+        """Move an off-grid object to another layer, on top of the objects already on it."""
+        if self.map_locked():
+            return
+        self.touch_offgrid(offgrid_key)
+        self.offgrid.set_layer(offgrid_key, new_layer_num)
+        self.offgrid_layers.add(offgrid_key, new_layer_num)
+        self.invalidate_map()
 
     def change_size(self,new_size) : 
-        for offgrid_key in self.offgrid :
-            offgrid = self.offgrid[offgrid_key]
-            if offgrid['selected'] :
-                offgrid['size'] = new_size
-
-                if offgrid_key in self.offgrid_rects:
-                    asset_img = self.game_assets[offgrid['type']]
-                    self.offgrid_rects[offgrid_key] = pygame.Rect(
-                        offgrid['pos'][0],
-                        offgrid['pos'][1],
-                        asset_img.get_width() * new_size,
-                        asset_img.get_height() * new_size
-                    )
+        if self.map_locked():
+            return
+        for offgrid_key in self.selected_offgrid:
+            self.touch_offgrid(offgrid_key)
+        self.offgrid.resize(self.selected_offgrid_ids(), new_size)
+        self.invalidate_map()
 
     def render(self):
-        """Render all editor components."""
-        self.render_tiles()
-        self.render_tilemap_assets()
-        self.render_tiles_data()
-        self.render_assets()
-        self.render_settings()
-        
-        # Blit all surfaces to the main screen
-        self.main_screen.fill(SCREEN_COLOR)
-        self.main_screen.blit(self.editor_surface, self.editor_rect.topleft)
-        self.main_screen.blit(self.tilemap_window_surf, self.tilemap_window_rect.topleft)
-        self.main_screen.blit(self.tile_info_window, self.tile_info_rect.topleft)
-        self.main_screen.blit(self.assets_window, self.assets_window_rect.topleft)
-        self.main_screen.blit(self.settings_window, self.settings_window_rect.topleft)
+        """Render the panels that changed and return the screen rects to update."""
+        if self.full_redraw:
+            self.main_screen.fill(SCREEN_COLOR)
+        
+        updated_rects = []
+        for panel_name, (render_panel, surface, rect) in self.panels.items():
+            if panel_name in self.dirty_panels:
+                render_panel()
+                self.main_screen.blit(surface, rect.topleft)
+                updated_rects.append(rect)
+        self.dirty_panels.clear()
+        
+        if self.full_redraw:
+            self.full_redraw = False
+            return [self.main_screen.get_rect()]
+        return updated_rects
+    
+    def get_visible_rect(self):
+        """Return the part of the map shown on the scaled surface, in map coordinates."""
+        return pygame.Rect(
+            -self.camera_scroll[0], -self.camera_scroll[1],
+            math.ceil(self.scaled_width / self.map_scale), math.ceil(self.scaled_height / self.map_scale)
+        )
     
     def render_tiles(self):
         """Render the tilemap to the editor surface."""
         self.scaled_surface.fill(EDITOR_BACKGROUND_COLOR)
+        visible_rect = self.get_visible_rect()
+        drawn = 0
+        
+        chunk_pixels = self.tile_map.chunk_size * self.tile_size
+        visible_chunks = self.tile_map.chunks_in_region(
+            visible_rect.left // self.tile_size,
+            visible_rect.top // self.tile_size,
+            -(-visible_rect.right // self.tile_size),
+            -(-visible_rect.bottom // self.tile_size)
+        )
+        
+        # Render the baked chunks inside the visible region (their mips when zoomed out)
+        for chunk_pos in visible_chunks:
+            self.scaled_surface.blit(
+                self.chunk_renderer.get(chunk_pos, self.map_scale),
+                self.map_to_view(chunk_pos[0] * chunk_pixels, chunk_pos[1] * chunk_pixels)
+            )
+            drawn += self.tile_map.chunks[chunk_pos].count
+        
+        # Sprites larger than a tile are clipped by the chunk bakes: draw them whole on top,
+        # including those of chunks above and to the left that reach into view
+        margin = self.chunk_renderer.overdraw_margin()
+        if margin:
+            overdraw_chunks = self.tile_map.chunks_in_region(
+                visible_rect.left // self.tile_size - margin,
+                visible_rect.top // self.tile_size - margin,
+                -(-visible_rect.right // self.tile_size),
+                -(-visible_rect.bottom // self.tile_size)
+            )
+            for chunk_pos in overdraw_chunks:
+                for type_name, rotate, tile_x, tile_y in self.chunk_renderer.oversized_tiles(chunk_pos):
+                    sprite = self.sprite_cache.get(type_name, rotate)
+                    if self.map_scale != 1:
+                        sprite = self.sprite_cache.get(type_name, rotate, (
+                            max(1, sprite.get_width() * self.map_scale), max(1, sprite.get_height() * self.map_scale)
+                        ))
+                    self.scaled_surface.blit(sprite, self.map_to_view(tile_x * self.tile_size, tile_y * self.tile_size))
+        
+        # Highlight selected tiles
+        view_tile_size = max(1, math.ceil(self.tile_size * self.map_scale))
+        for tile_x, tile_y in self.selected_tiles:
+            rect = pygame.Rect(
+                self.map_to_view(tile_x * self.tile_size, tile_y * self.tile_size),
+                (view_tile_size, view_tile_size)
+            )
+            if rect.colliderect(self.scaled_surface.get_rect()):
+                pygame.draw.rect(self.scaled_surface, SELECT_COLOR, rect, width=1)
         
-        # Render all tiles
-        for tile_data in self.tile_map.values():
-            self.render_tile(tile_data)
+        # Outline the selected region, or the rectangle being dragged
+        region = self.selected_region
+        if self.marquee is not None:
+            (start_x, start_y), (end_x, end_y) = self.marquee
+            region = (min(start_x, end_x), min(start_y, end_y), max(start_x, end_x) + 1, max(start_y, end_y) + 1)
+        if region is not None:
+            x0, y0, x1, y1 = region
+            pygame.draw.rect(self.scaled_surface, SELECT_COLOR, pygame.Rect(
+                self.map_to_view(x0 * self.tile_size, y0 * self.tile_size),
+                ((x1 - x0) * self.tile_size * self.map_scale, (y1 - y0) * self.tile_size * self.map_scale)
+            ), width=1)
         
-        # Render all off-grid objects
-        for offgrid_data in self.offgrid.values():
-            self.render_offgrid(offgrid_data)
+        # Render the off-grid objects inside the visible region, lowest layer first
+        visible_offgrid = self.offgrid_layers.draw_order(self.offgrid.query_rect(visible_rect))
+        for offgrid_key in visible_offgrid:
+            self.render_offgrid(offgrid_key)
+            drawn += 1
+        
+        self.render_stats["drawn"] = drawn
+        self.render_stats["chunks"] = len(visible_chunks)
+        self.render_stats["culled"] = len(self.tile_map) + len(self.offgrid) - drawn
         
         # Draw grid if enabled
         if self.settings_buttons["Show Grid"][1]:
@@ -651,62 +1039,63 @@ class Editor:
         self.render_asset_preview()
         
         # Scale up and blit to editor surface
-        scaled = pygame.transform.scale(self.scaled_surface, (self.editor_width, self.editor_height))
-        self.editor_surface.blit(scaled, (0, 0))
-    
-    def render_tile(self, tile_data):
-        """Render a single tile."""
-        x = tile_data["pos"][0] * self.tile_size
-        y = tile_data["pos"][1] * self.tile_size
-        tile_image = self.game_assets[tile_data["type"]]
+        if self.scaled_surface.get_size() == (self.editor_width, self.editor_height):
+            self.editor_surface.blit(self.scaled_surface, (0, 0))
+        else:
+            scaled = pygame.transform.scale(self.scaled_surface, (self.editor_width, self.editor_height))
+            self.editor_surface.blit(scaled, (0, 0))
         
-        # Draw the tile
-        self.scaled_surface.blit(
-            pygame.transform.rotate(tile_image, tile_data['rotate'] * 90),
-            (x + self.camera_scroll[0], y + self.camera_scroll[1])
-        )
+        if self.settings_buttons["Show Minimap"][1]:
+            self.render_minimap()
+    
+    def render_minimap(self):
+        """Draw the minimap with the visible part of the map outlined over the editor surface."""
+        self.minimap.update()
+        minimap_pos = (self.minimap_rect.x - self.editor_rect.x, self.minimap_rect.y - self.editor_rect.y)
+        self.editor_surface.blit(self.minimap.surface, minimap_pos)
         
-        # Highlight selected tiles
-        if tile_data['selected']:
-            rect_pos_x = tile_data['pos'][0] * self.tile_size
-            rect_pos_y = tile_data['pos'][1] * self.tile_size
-            rect = pygame.Rect(
-                rect_pos_x + self.camera_scroll[0],
-                rect_pos_y + self.camera_scroll[1],
-                self.tile_size, self.tile_size
-            )
-            pygame.draw.rect(self.scaled_surface, SELECT_COLOR, rect, width=1)
+        visible_rect = self.get_visible_rect()
+        left, top = self.minimap.to_pixels(visible_rect.left / self.tile_size, visible_rect.top / self.tile_size)
+        right, bottom = self.minimap.to_pixels(visible_rect.right / self.tile_size, visible_rect.bottom / self.tile_size)
+        minimap_area = pygame.Rect(minimap_pos, MINIMAP_SIZE)
+        viewport = pygame.Rect(
+            minimap_pos[0] + left, minimap_pos[1] + top, max(2, right - left), max(2, bottom - top)
+        ).clip(minimap_area)
+        if viewport.width and viewport.height:
+            pygame.draw.rect(self.editor_surface, SELECT_COLOR, viewport, width=1)
+        pygame.draw.rect(self.editor_surface, GRID_LINES_COLOR, minimap_area, width=1)
     
-    def render_offgrid(self, offgrid_data):
+    def render_offgrid(self, offgrid_key):
         """Render a single off-grid object."""
-        offgrid_image = self.game_assets[offgrid_data["type"]]
+        offgrid = self.offgrid
+        width = max(1, offgrid.width[offgrid_key] * self.map_scale)
+        height = max(1, offgrid.height[offgrid_key] * self.map_scale)
+        screen_x, screen_y = self.map_to_view(offgrid.x[offgrid_key], offgrid.y[offgrid_key])
         self.scaled_surface.blit(
-            pygame.transform.scale(pygame.transform.rotate(offgrid_image, offgrid_data['rotate'] * 90),(offgrid_image.get_width()*offgrid_data['size'],offgrid_image.get_height()*offgrid_data['size'])),
-            (offgrid_data['pos'][0] + self.camera_scroll[0],
-            offgrid_data['pos'][1] + self.camera_scroll[1]))
+            self.sprite_cache.get(
+                offgrid.type_names[offgrid.type_id[offgrid_key]], int(offgrid.rotate[offgrid_key]), (width, height)
+            ),
+            (screen_x, screen_y))
         
         # Highlight selected off-grid objects
-        if offgrid_data['selected']:
-            rect_pos_x = offgrid_data['pos'][0]
-            rect_pos_y = offgrid_data['pos'][1]
-            rect = pygame.Rect(
-                rect_pos_x + self.camera_scroll[0],
-                rect_pos_y + self.camera_scroll[1],
-                self.game_assets[offgrid_data['type']].get_width() * offgrid_data['size'], self.game_assets[offgrid_data['type']].get_height() * offgrid_data['size']
-            )
+        if offgrid_key in self.selected_offgrid:
+            rect = pygame.Rect(screen_x, screen_y, width, height)
             pygame.draw.rect(self.scaled_surface, SELECT_COLOR, rect, width=1)
     
     def draw_grid(self):
         """Draw grid lines on the editor surface."""
         grid_color = GRID_LINES_COLOR
+        spacing = self.tile_size * self.map_scale
+        if spacing < 4:
+            return  # too dense to be useful when zoomed far out
         
         # Vertical lines
-        for x in range(0, self.scaled_width, self.tile_size):
-            pygame.draw.line(self.scaled_surface, grid_color, (x, 0), (x, self.scaled_height))
+        for x in range(0, math.ceil(self.scaled_width / spacing)):
+            pygame.draw.line(self.scaled_surface, grid_color, (x * spacing, 0), (x * spacing, self.scaled_height))
         
         # Horizontal lines
-        for y in range(0, self.scaled_height, self.tile_size):
-            pygame.draw.line(self.scaled_surface, grid_color, (0, y), (self.scaled_width, y))
+        for y in range(0, math.ceil(self.scaled_height / spacing)):
+            pygame.draw.line(self.scaled_surface, grid_color, (0, y * spacing), (self.scaled_width, y * spacing))
     
     def render_asset_preview(self):
         """Show a preview of the currently selected asset under the mouse."""
@@ -714,19 +1103,26 @@ class Editor:
             mouse_x, mouse_y = pygame.mouse.get_pos()
             
             if self.editor_rect.collidepoint(mouse_x, mouse_y):
-                asset_img = self.game_assets[self.default_asset_key[0]].copy()
-                asset_img.set_alpha(128)
+                if self.map_scale < 1:
+                    width, height = self.game_assets.get_size(self.default_asset_key[0])
+                    asset_img = self.sprite_cache.get(
+                        self.default_asset_key[0], alpha=128,
+                        size=(max(1, width * self.map_scale), max(1, height * self.map_scale))
+                    )
+                else:
+                    asset_img = self.sprite_cache.get(self.default_asset_key[0], alpha=128)
                 
                 if self.default_asset_key[1]:  # On grid
                     scaled_x = ((mouse_x - 10) * self.scaled_width / self.editor_width)
                     scaled_y = ((mouse_y - 10) * self.scaled_height / self.editor_height)
                     
-                    tile_x = int(scaled_x / self.tile_size)
-                    tile_y = int(scaled_y / self.tile_size)
+                    view_tile_size = self.tile_size * self.map_scale
+                    tile_x = int(scaled_x / view_tile_size)
+                    tile_y = int(scaled_y / view_tile_size)
                     
                     self.scaled_surface.blit(
                         asset_img,
-                        (tile_x * self.tile_size, tile_y * self.tile_size)
+                        (tile_x * view_tile_size, tile_y * view_tile_size)
                     )
                 else:  # Off grid
                     scaled_x = ((mouse_x - 25) * self.scaled_width / self.editor_width)
@@ -735,20 +1131,12 @@ class Editor:
                     self.scaled_surface.blit(asset_img, (scaled_x, scaled_y))
     
     def render_tilemap_assets(self):
-        """Render the list of placed tiles in the tilemap window."""
-        tile_display_size = 25
-        padding = 15
-        increasing_rate = tile_display_size + padding
-        
+        """Render the rows of the placed tiles list that fit in the tilemap window."""
         self.tilemap_window_surf.fill(WINDOWS_COLOR)
         
-        # Combine tiles and off-grid objects for display
-        tiles = self.tile_map.values()
-        offgrids = self.offgrid
-        
         if len(self.tile_map) == 0 and len(self.offgrid) == 0:
-            empty_text = self.tile_window_font.render(
-                "There is no tile to be shown", True, FONT_COLOR_LIGHT
+            empty_text = render_text(
+                self.tile_window_font, "There is no tile to be shown", True, FONT_COLOR_LIGHT
             )
             self.tilemap_window_surf.blit(
                 empty_text,
@@ -756,80 +1144,52 @@ class Editor:
             )
             return
         
-        # Render each tile in the list
-        start_pos_y = 10 + self.tilemap_window_scroll
-        self.tiles_rects = {}
-        self.window_offgrid_rects = {}
-        
-        for i, tile in enumerate(tiles):
-            # Create background rectangle for the tile entry
-            tile_rect = pygame.Rect(
-                4, start_pos_y - 6,
-                self.tilemap_window_resolution[0] - 10,
-                tile_display_size + 12
-            )
-            
-            # Draw the background (highlighted if selected)
-            pygame.draw.rect(
-                self.tilemap_window_surf,
-                SELECT_COLOR if tile['selected'] else SCREEN_COLOR,
-                tile_rect
-            )
-            
-            # Draw the tile preview
-            self.tilemap_window_surf.blit(
-                pygame.transform.scale(self.game_assets[tile['type']], (25, 25)),
-                (10, start_pos_y)
-            )
-            
-            # Draw the tile name
-            tile_name = self.tile_window_font.render(
-                tile['type'],
-                True,
-                FONT_COLOR_DARK if tile['selected'] else FONT_COLOR_LIGHT
-            )
-            self.tilemap_window_surf.blit(tile_name, (40, start_pos_y + 2.5))
-            
-            # Store the rectangle for click detection
-            if i < len(self.tile_map):
-                self.tiles_rects[f"{tile['pos'][0]};{tile['pos'][1]}"] = tile_rect
-            
-            start_pos_y += increasing_rate
-
-        for offgrid_key in offgrids:
-            offgrid = offgrids[offgrid_key]
-            # Create background rectangle for the tile entry
-            tile_rect = pygame.Rect(
-                4, start_pos_y - 6,
-                self.tilemap_window_resolution[0] - 10,
-                tile_display_size + 12
-            )
-            
+        # Only the rows inside the window are drawn
+        row_height = self.tilemap_row_height
+        first_row = max(0, (-self.tilemap_window_scroll - 4) // row_height)
+        last_row = (self.tilemap_window_height - 4 - self.tilemap_window_scroll) // row_height
+        first_row, last_row = int(first_row), int(last_row) + 1
+        
+        rows = []
+        tiles_count = len(self.tile_map)
+        if first_row < tiles_count:
+            for tile_x, tile_y, tile_type, _ in self.tile_map.tiles_slice(first_row, last_row):
+                rows.append((tile_type, self.is_tile_selected(tile_x, tile_y)))
+        offgrid_start = max(0, first_row - tiles_count)
+        offgrid_stop = max(0, last_row - tiles_count)
+        for offgrid_key in self.offgrid_layers.keys_slice(offgrid_start, offgrid_stop):
+            rows.append((
+                self.offgrid.type_names[self.offgrid.type_id[offgrid_key]], offgrid_key in self.selected_offgrid
+            ))
+        
+        start_pos_y = 10 + self.tilemap_window_scroll + first_row * row_height
+        for row_type, row_selected in rows:
             # Draw the background (highlighted if selected)
             pygame.draw.rect(
                 self.tilemap_window_surf,
-                SELECT_COLOR if offgrid['selected'] else SCREEN_COLOR,
-                tile_rect
+                SELECT_COLOR if row_selected else SCREEN_COLOR,
+                pygame.Rect(
+                    4, start_pos_y - 6,
+                    self.tilemap_window_resolution[0] - 10,
+                    self.tilemap_thumbnail_size + 12
+                )
             )
             
             # Draw the tile preview
             self.tilemap_window_surf.blit(
-                pygame.transform.scale(self.game_assets[offgrid['type']], (25, 25)),
+                self.sprite_cache.get(row_type, size=(self.tilemap_thumbnail_size, self.tilemap_thumbnail_size)),
                 (10, start_pos_y)
             )
             
             # Draw the tile name
-            tile_name = self.tile_window_font.render(
-                offgrid['type'],
+            tile_name = render_text(
+                self.tile_window_font, row_type,
                 True,
-                FONT_COLOR_DARK if offgrid['selected'] else FONT_COLOR_LIGHT
+                FONT_COLOR_DARK if row_selected else FONT_COLOR_LIGHT
             )
             self.tilemap_window_surf.blit(tile_name, (40, start_pos_y + 2.5))
             
-            # Store the rectangle for click detection
-            self.window_offgrid_rects[offgrid_key] = tile_rect
-            
-            start_pos_y += increasing_rate
+            start_pos_y += row_height
     
     def render_tiles_data(self):
         """Render information about the selected tile in the info window."""
@@ -838,20 +1198,19 @@ class Editor:
         offgrid_is_selected = False
         
         # Check for selected tiles first
-        for tile in self.tile_map.values():
-            if tile['selected']:
+        for tile_pos in self.selected_tiles:
+            if self.render_tile_info(tile_pos):
                 tile_is_selected = True
-                self.render_tile_info(tile)
                 break
-        for offgrid in self.offgrid.values() :
-            if offgrid['selected'] :
-                self.render_offgrid_info(offgrid)
-                offgrid_is_selected = True
+        selected_offgrid = [self.offgrid[offgrid_key] for offgrid_key in sorted(self.selected_offgrid)]
+        for offgrid in selected_offgrid :
+            self.render_offgrid_info(offgrid)
+            offgrid_is_selected = True
 
         # If no tile is selected, show a message
         if not tile_is_selected and not offgrid_is_selected:
-            empty_text = self.tile_info_font.render(
-                "there is no tile selected", False, FONT_COLOR_LIGHT
+            empty_text = render_text(
+                self.tile_info_font, "there is no tile selected", False, FONT_COLOR_LIGHT
             )
             self.tile_info_window.blit(
                 empty_text,
@@ -863,17 +1222,16 @@ class Editor:
             for option_name, option in self.tiles_options_rects.items():
                 if option_name.endswith("txt"):
                     # Text input option
-                    option.render(self.tile_info_window)
-                    for offgrid in self.offgrid.values() :
-                        if offgrid['selected'] :
+                    for offgrid in selected_offgrid :
                             if not option.stats :
                                 if option_name[:-4] == 'layer' :
                                     option.text = str(offgrid['layer'])
                                 elif option_name[:-4] == 'size' :
                                     option.text = str(offgrid['size'])
+                    option.render(self.tile_info_window)
                     
-                    option_label = self.tile_info_font.render(
-                        "- " + option_name[:-4] + " " + (f"[F]" if option_name[:-4] == 'size' else "[" + option_name[0].upper() + "]") , True, (255, 255, 255)
+                    option_label = render_text(
+                        self.tile_info_font, "- " + option_name[:-4] + " " + (f"[F]" if option_name[:-4] == 'size' else "[" + option_name[0].upper() + "]") , True, (255, 255, 255)
                     )
                     self.tile_info_window.blit(
                         option_label,
@@ -887,94 +1245,125 @@ class Editor:
                         option[0]
                     )
                     
-                    button_state = self.tile_info_font.render(
-                        "ON" if option[1] else "OFF", True, (255, 255, 255))
+                    button_state = render_text(
+                        self.tile_info_font, "ON" if option[1] else "OFF", True, (255, 255, 255))
                     self.tile_info_window.blit(
                         button_state,
                         (option[0].left + 5, option[0].top + 2))
                     
-                    option_label = self.tile_info_font.render(
-                        "- " + option_name, True, (255, 255, 255))
+                    option_label = render_text(
+                        self.tile_info_font, "- " + option_name, True, (255, 255, 255))
                     self.tile_info_window.blit(
                         option_label,
                         (option[0].left - 230, option[0].top + 2))
     
-    def render_tile_info(self, tile):
-        """Render detailed information about a specific tile."""
+    def render_tile_info(self, tile_pos):
+        """Render detailed information about a specific tile. Returns False if there is no tile there."""
+        tile = self.tile_map.get(*tile_pos)
+        if tile is None:
+            return False
+        tile_type, rotate = tile
         # Display basic tile info
-        tile_pos = self.tile_info_font.render(
-            " - Tile position : " + str(tile['pos']), False, FONT_COLOR_LIGHT
+        tile_pos = render_text(
+            self.tile_info_font, " - Tile position : " + str(list(tile_pos)), False, FONT_COLOR_LIGHT
         )
-        tile_type = self.tile_info_font.render(
-            " - Tile type : " + str(tile['type']), False, FONT_COLOR_LIGHT
+        tile_type = render_text(
+            self.tile_info_font, " - Tile type : " + str(tile_type), False, FONT_COLOR_LIGHT
         )
-        tile_rotation = self.tile_info_font.render(
-            " - Tile rotation : " + str((tile['rotate'] * 90) % 360), False, FONT_COLOR_LIGHT
+        tile_rotation = render_text(
+            self.tile_info_font, " - Tile rotation : " + str((rotate * 90) % 360), False, FONT_COLOR_LIGHT
         )
         
         self.tile_info_window.blit(tile_pos, (10, 10))
         self.tile_info_window.blit(tile_type, (10, 35))
         self.tile_info_window.blit(tile_rotation, (10, 60))
+        return True
     
     def render_offgrid_info(self,offgrid):
         """Render detailed information about a specific tile."""
         # Display basic tile info
-        offgrid_pos = self.tile_info_font.render(
-            " - Tile position : " + str(offgrid['pos']), False, FONT_COLOR_LIGHT
+        offgrid_pos = render_text(
+            self.tile_info_font, " - Tile position : " + str(offgrid['pos']), False, FONT_COLOR_LIGHT
         )
-        offgrid_type = self.tile_info_font.render(
-            " - Tile type : " + str(offgrid['type']), False, FONT_COLOR_LIGHT
+        offgrid_type = render_text(
+            self.tile_info_font, " - Tile type : " + str(offgrid['type']), False, FONT_COLOR_LIGHT
         )
-        offgrid_rotation = self.tile_info_font.render(
-            " - Tile rotation : " + str((offgrid['rotate'] * 90) % 360), False, FONT_COLOR_LIGHT
+        offgrid_rotation = render_text(
+            self.tile_info_font, " - Tile rotation : " + str((offgrid['rotate'] * 90) % 360), False, FONT_COLOR_LIGHT
         )
         
         self.tile_info_window.blit(offgrid_pos, (10, 10))
         self.tile_info_window.blit(offgrid_type, (10, 35))
         self.tile_info_window.blit(offgrid_rotation, (10, 60))
 
+    def build_palette(self):
+        """Prepare the asset palette: an atlas of thumbnails filled as rows become visible."""
+        self.palette_keys = list(self.game_assets.keys())
+        thumbnail_size = self.palette_thumbnail_size
+        rows = max(1, math.ceil(len(self.palette_keys) / ASSETS_PER_ROW))
+        self.palette_atlas = pygame.Surface((ASSETS_PER_ROW * thumbnail_size, rows * thumbnail_size))
+        self.palette_filled = bytearray(len(self.palette_keys))  # 1 once a thumbnail is in the atlas
+        self.palette_labels = []  # per asset: (label, selected label)
+        
+        for key in self.palette_keys:
+            # Asset name, truncated if too long
+            display_name = key if len(key) < 5 else f"{key[:6]}.."
+            self.palette_labels.append((
+                self.assets_font.render(display_name, False, FONT_COLOR_LIGHT),
+                self.assets_font.render(display_name, False, FONT_COLOR_DARK)
+            ))
+    
+    def visible_palette_range(self):
+        """Return the (first, last + 1) indexes of the assets in palette rows inside the window."""
+        start_y = 20 + self.assets_window_scroll * ASSETS_SCROLL_SPEED
+        tile_size = self.palette_thumbnail_size
+        cell_height = self.palette_cell_height
+        
+        # Rows whose boxes (from y - 5 to y + tile_size + 28) intersect the window
+        first_row = max(0, int((-start_y - tile_size - 28) // cell_height) + 1)
+        last_row = int((self.assets_height + 5 - start_y) // cell_height)
+        return first_row * ASSETS_PER_ROW, min(len(self.palette_keys), (last_row + 1) * ASSETS_PER_ROW)
+    
     def render_assets(self):
-        """Render the assets selection window."""
+        """Render the rows of the assets palette that fit in the assets window."""
         self.assets_window.fill(WINDOWS_COLOR)
         
-        start_x = 25
         start_y = 20 + self.assets_window_scroll * ASSETS_SCROLL_SPEED
-        padding_x = 20
-        padding_y = 40
-        tile_size = 50
-        assets_per_row = ASSETS_PER_ROW
+        tile_size = self.palette_thumbnail_size
+        first_index, last_index = self.visible_palette_range()
         
-        self.assets_info = {}
+        # Decode the assets of newly visible rows together
+        self.game_assets.preload(
+            self.palette_keys[index] for index in range(first_index, last_index) if not self.palette_filled[index]
+        )
         
-        for index, (key, img) in enumerate(self.game_assets.items()):
-            col = index % assets_per_row
-            row = index // assets_per_row
+        for index in range(first_index, last_index):
+            key = self.palette_keys[index]
+            row, col = divmod(index, ASSETS_PER_ROW)
+            selected = self.default_asset_key[0] == key
+            atlas_rect = pygame.Rect(col * tile_size, row * tile_size, tile_size, tile_size)
             
-            x = start_x + col * (tile_size + padding_x)
-            y = start_y + row * (tile_size + padding_y)
+            if not self.palette_filled[index]:
+                self.palette_atlas.blit(
+                    pygame.transform.scale(self.game_assets[key], (tile_size, tile_size)), atlas_rect
+                )
+                self.palette_filled[index] = 1
             
-            # Create rectangle for the asset
-            rect = pygame.Rect(x - 5, y - 5, tile_size + 10, tile_size + 33)
-            self.assets_info[key] = rect
+            x = self.palette_start_x + col * self.palette_cell_width
+            y = start_y + row * self.palette_cell_height
             
             # Draw the asset background (highlighted if selected)
             pygame.draw.rect(
                 self.assets_window,
-                SELECT_COLOR if self.default_asset_key[0] == key else SCREEN_COLOR,
-                rect
+                SELECT_COLOR if selected else SCREEN_COLOR,
+                pygame.Rect(x - 5, y - 5, tile_size + 10, tile_size + 33)
             )
             
-            # Draw the asset image
-            scaled_img = pygame.transform.scale(img, (tile_size, tile_size))
-            self.assets_window.blit(scaled_img, (x, y))
+            # Draw the asset image from the atlas
+            self.assets_window.blit(self.palette_atlas, (x, y), atlas_rect)
             
-            # Draw the asset name (truncated if too long)
-            display_name = key if len(key) < 5 else f"{key[:6]}.."
-            tile_name = self.assets_font.render(
-                display_name, False,
-                FONT_COLOR_DARK if self.default_asset_key[0] == key else FONT_COLOR_LIGHT
-            )
-            self.assets_window.blit(tile_name, (x, y + tile_size + 10))
+            # Draw the asset name
+            self.assets_window.blit(self.palette_labels[index][selected], (x, y + tile_size + 10))
     
     def render_settings(self):
         """Render the settings window."""
@@ -987,8 +1376,8 @@ class Editor:
                 button.render(self.settings_window)
                 
                 # Draw the label
-                label = self.settings_font.render(
-                    button_name[:-4], True, (255, 255, 255))
+                label = render_text(
+                    self.settings_font, button_name[:-4], True, (255, 255, 255))
                 self.settings_window.blit(
                     label,
                     (button.rect.topleft[0] - 175, button.rect.topleft[1] + 10))
@@ -1007,59 +1396,363 @@ class Editor:
                 else:
                     button_text = "ON" if button[1] else "OFF"
                 
-                text_surface = self.settings_font.render(button_text, True, (255, 255, 255))
+                text_surface = render_text(self.settings_font, button_text, True, (255, 255, 255))
                 self.settings_window.blit(
                     text_surface,
                     (button[0].topleft[0] + 4, button[0].topleft[1] + 3))
                 
                 # Draw the button label
-                label = self.settings_font.render(button_name, True, (255, 255, 255))
+                label = render_text(self.settings_font, button_name, True, (255, 255, 255))
                 self.settings_window.blit(
                     label,
                     (button[0].topleft[0] - 230, button[0].topleft[1] + 10))
+        
+        # Status line (map loading/saving progress and errors)
+        if self.status_text:
+            status = render_text(self.settings_font, self.status_text, True, FONT_COLOR_LIGHT)
+            self.settings_window.blit(status, (10, self.settings_height - 30))
     
-    def save_map(self):
-        """Save the current tilemap to a file."""
-        for button_name, button in self.settings_buttons.items():
-            if button_name == "map name txt":
-                try :
-                    file_path = os.path.join("Maps", f"{button.text}.json")
-                    with open(file_path, 'w') as file:
-                        json.dump({ 
-                            'tile_map' : self.tile_map,
-                            'offgrid' : self.offgrid,
-                            'tile_size' : self.tile_size,
-                            },
-                            file
-                            )
-                    break
-                except :
-                    pass
+    def map_file_path(self, map_name):
+        """Return the file of a map: the MAP_FORMAT file if it exists, otherwise the other format."""
+        extensions = [JSON_MAP_EXTENSION, BINARY_MAP_EXTENSION]
+        if MAP_FORMAT == "binary":
+            extensions.reverse()
+        for extension in extensions:
+            file_path = os.path.join("Maps", f"{map_name}{extension}")
+            if os.path.exists(file_path):
+                return file_path
+        return os.path.join("Maps", f"{map_name}{extensions[0]}")
+    
+    def save_map(self, file_path=None):
+        """Start saving a snapshot of the current tilemap on a worker thread.
+
+        Without a file path the map is saved under the name in the map name box.
+        """
+        map_name = self.settings_buttons["map name txt"].text
+        if file_path is None and not map_name:
+            self.set_status("Enter a map name to save")
+            return
+        if self.map_loader is not None:
+            self.set_status("Wait for the map to finish loading")
+            return
+        if self.map_saver is not None:
+            self.set_status("A save is already in progress")
+            return
+        
+        if file_path is None:
+            extension = BINARY_MAP_EXTENSION if MAP_FORMAT == "binary" else JSON_MAP_EXTENSION
+            file_path = os.path.join("Maps", f"{map_name}{extension}")
+        
+        # The full save makes the journal redundant: move it aside until the save has succeeded
+        if MAP_JOURNAL:
+            if self.journal is None or self.journal.map_path != file_path:
+                self.flush_journal()
+                self.journal = MapJournal(file_path)
+            self.journal.mark_saved()
+        
+        self.map_saver = MapSaveJob(
+            file_path,
+            self.tile_map.copy(),
+            self.offgrid.to_dict(self.offgrid_layers),
+            self.tile_size
+        )
+        self.unsaved_edits = 0
+        self.last_save_time = time.monotonic()
+        self.set_status(f"Saving {os.path.basename(file_path)}...")
+    
+    def update_map_saving(self):
+        """Report a finished save and start an autosave when one is due."""
+        job = self.map_saver
+        if job is not None and job.finished:
+            self.map_saver = None
+            if job.error:
+                self.set_status(f"Save failed: {job.error}")
+            else:
+                self.set_status(f"Saved {os.path.basename(job.file_path)}")
+                if self.journal is not None and self.journal.map_path == job.file_path:
+                    self.journal.compacted()
+        
+        if (AUTOSAVE_INTERVAL and self.unsaved_edits and self.map_saver is None and self.map_loader is None
+                and self.settings_buttons["map name txt"].text
+                and time.monotonic() - self.last_save_time >= AUTOSAVE_INTERVAL):
+            self.save_map()
+    
+    def update_history(self):
+        """Close the open undo step unless a drag is in progress (a whole drag is one step)."""
+        if not self.left_clicking:
+            self.history.close(self.tile_map, self.offgrid)
+    
+    def undo(self):
+        """Undo the latest edit step."""
+        if self.map_locked():
+            return
+        self.history.close(self.tile_map, self.offgrid)
+        step = self.history.undo()
+        if step is not None:
+            self.apply_step(step, undo=True)
+    
+    def redo(self):
+        """Redo the latest undone edit step."""
+        if self.map_locked():
+            return
+        self.history.close(self.tile_map, self.offgrid)
+        step = self.history.redo()
+        if step is not None:
+            self.apply_step(step, undo=False)
+    
+    def apply_step(self, step, undo):
+        """Put the items of an edit step back to their state before (undo) or after it."""
+        self.unsaved_edits += 1
+        for tile_x, tile_y, before, after in step.tiles:
+            state = before if undo else after
+            if self.journal is not None:
+                self.journal.record_tile(tile_x, tile_y)
+            if state is None:
+                self.tile_map.remove(tile_x, tile_y)
+                self.selected_tiles.discard((tile_x, tile_y))
+            else:
+                self.tile_map.set(tile_x, tile_y, state[0], state[1])
+        
+        for x0, y0, before, after in (reversed(step.regions) if undo else step.regions):
+            types, rotations = before if undo else after
+            if self.journal is not None:
+                self.journal.record_region(x0, y0, x0 + types.shape[1], y0 + types.shape[0])
+            self.tile_map.write_region(x0, y0, types, rotations)
+        if step.regions:
+            self.prune_selection()
+        
+        for offgrid_key, before, after in step.offgrid:
+            state = before if undo else after
+            if self.journal is not None:
+                self.journal.record_offgrid(offgrid_key)
+            if state is None:
+                self.delete_offgrid(offgrid_key)
+            else:
+                self.place_offgrid(offgrid_key, dict(state))
+        self.invalidate_map()
+    
+    def touch_tile(self, tile_x, tile_y):
+        """Note that the tile at (tile_x, tile_y) is about to change (for undo, the journal and autosave)."""
+        self.unsaved_edits += 1
+        self.history.touch_tile(self.tile_map, tile_x, tile_y)
+        if self.journal is not None:
+            self.journal.record_tile(tile_x, tile_y)
+    
+    def touch_offgrid(self, offgrid_key):
+        """Note that an off-grid object is about to change, be added or be removed (for undo, the journal and autosave)."""
+        self.unsaved_edits += 1
+        self.history.touch_offgrid(self.offgrid, offgrid_key)
+        if self.journal is not None:
+            self.journal.record_offgrid(offgrid_key)
+    
+    def touch_region(self, region):
+        """Note that the tiles of `region` (x0, y0, x1, y1) are about to change in bulk.
+
+        This closes the open undo step first; tiles touched afterwards join the region's step.
+        """
+        self.unsaved_edits += 1
+        self.history.touch_region(self.tile_map, self.offgrid, *region)
+        if self.journal is not None:
+            self.journal.record_region(*region)
+    
+    def flush_journal(self):
+        """Append the pending journal records to the journal file."""
+        if self.journal is None:
+            return
+        try:
+            self.journal.flush(self.tile_map, self.offgrid)
+        except OSError as error:
+            self.set_status(f"Journal write failed: {error}")
+        self.last_journal_flush = time.monotonic()
+    
+    def update_journal(self):
+        """Flush the journal every JOURNAL_FLUSH_INTERVAL seconds and compact it once it grows too long."""
+        if self.journal is None:
+            return
+        if self.journal.has_pending() and time.monotonic() - self.last_journal_flush >= JOURNAL_FLUSH_INTERVAL:
+            self.flush_journal()
+        if self.journal.records >= JOURNAL_COMPACT_RECORDS and self.map_saver is None and self.map_loader is None:
+            self.save_map(self.journal.map_path)
+    
+    def open_journal(self, file_path):
+        """Start journaling edits to a freshly loaded map, replaying the edits logged since its last full save."""
+        self.journal = None
+        if not MAP_JOURNAL:
+            return
+        self.journal = MapJournal(file_path)
+        try:
+            replayed = self.journal.replay(self.tile_map, self.offgrid)
+        except (OSError, ValueError, IndexError, KeyError, TypeError) as error:
+            self.set_status(f"Journal replay failed: {error}")
+            return
+        if replayed:
+            self.index_offgrid()
+            self.set_status(f"Recovered {replayed} journaled edits")
+    
+    def set_status(self, text):
+        """Show a message on the status line of the settings panel."""
+        self.status_text = text
+        self.invalidate("settings")
     
     def load_map(self):
         """Load a tilemap from a file."""
         for button_name, button in self.settings_buttons.items():
             if button_name == "map name txt":
                 try :
-                    file_path = os.path.join("Maps", f"{button.text}.json")
-                    if os.path.exists(file_path):
-                        with open(file_path, 'r') as file:
-                            data = json.load(file)
-                            self.offgrid = data['offgrid']
-                            self.offgrid_rects = {}
-                            for offgrid_key in self.offgrid :
-                                offgrid = self.offgrid[offgrid_key]
-                                self.offgrid_rects[offgrid_key] = pygame.Rect(
-                                    offgrid['pos'][0], offgrid['pos'][1],
-                                    self.game_assets[offgrid['type']].get_width(),
-                                    self.game_assets[offgrid['type']].get_height()
-                                )
-                            self.tile_map = data['tile_map']
-                            self.tile_size = data['tile_size']
+                    file_path = self.map_file_path(button.text)
+                    if self.map_loader is not None:
+                        self.map_loader.cancel()
+                        self.map_loader = None
+                    self.flush_journal()
+                    if (os.path.exists(file_path) and file_path.endswith(JSON_MAP_EXTENSION)
+                            and os.path.getsize(file_path) > STREAMING_LOAD_THRESHOLD):
+                        self.start_map_loading(file_path)
+                    elif os.path.exists(file_path):
+                        # Parse everything into new containers first so a bad file leaves the current map untouched
+                        tile_map = TileMap(self.tile_map.chunk_size)
+                        data = load_map_file(file_path, tile_map)
+                        offgrid_store = OffgridStore(self.game_assets.get_size)
+                        for offgrid_key, offgrid in data['offgrid'].items():
+                            offgrid_store.add(offgrid, offgrid_id(offgrid_key))
+                        tile_size = int(data['tile_size'])
+                        
+                        self.tile_map.take(tile_map)
+                        self.offgrid = offgrid_store
+                        self.index_offgrid()
+                        self.history.clear()
+                        self.selected_tiles = set()
+                        self.selected_offgrid = set()
+                        self.selected_region = None
+                        self.marquee = None
+                        self.tile_size = tile_size
+                        self.chunk_renderer.reset(self.tile_size)
+                        self.minimap.reset()
+                        self.unsaved_edits = 0
+                        self.set_status(f"Loaded {os.path.basename(file_path)}")
+                        self.open_journal(file_path)
+                        self.game_assets.preload(
+                            self.tile_map.type_names + self.offgrid.type_names
+                        )
+                        self.invalidate()
+                    else:
+                        self.set_status(f"{os.path.basename(file_path)} not found")
                     break
-                except :
-                    pass
-
+                except (OSError, ValueError, KeyError, IndexError, TypeError, struct.error) as error:
+                    self.set_status(f"Map load failed: {error}")
+                    break
+    
+    def place_offgrid(self, offgrid_key, offgrid):
+        """Add or replace an off-grid object under an ID and keep its layer bucket in sync."""
+        self.offgrid[offgrid_key] = offgrid
+        if self.offgrid_layers.layer_of(offgrid_key) != offgrid['layer']:
+            # A new layer puts the object on top of it
+            self.offgrid_layers.add(offgrid_key, offgrid['layer'])
+    
+    def delete_offgrid(self, offgrid_key):
+        """Remove an off-grid object, its layer bucket entry and its selection."""
+        if offgrid_key in self.offgrid:
+            del self.offgrid[offgrid_key]
+        self.offgrid_layers.remove(offgrid_key)
+        self.selected_offgrid.discard(offgrid_key)
+    
+    def prune_selection(self):
+        """Drop selected tile positions that no longer hold a tile, e.g. after a region write."""
+        self.selected_tiles = {tile_pos for tile_pos in self.selected_tiles if tile_pos in self.tile_map}
+    
+    def is_tile_selected(self, tile_x, tile_y):
+        """Return True if a tile is selected on its own or lies in the selected region."""
+        return (tile_x, tile_y) in self.selected_tiles or self.in_selected_region(tile_x, tile_y)
+    
+    def in_selected_region(self, tile_x, tile_y):
+        """Return True if a tile position lies in the selected region."""
+        if self.selected_region is None:
+            return False
+        x0, y0, x1, y1 = self.selected_region
+        return x0 <= tile_x < x1 and y0 <= tile_y < y1
+    
+    def selected_offgrid_ids(self):
+        """Return the IDs of the selected off-grid objects as an array (for the store's bulk operations)."""
+        return np.fromiter(self.selected_offgrid, np.int64, len(self.selected_offgrid))
+    
+    def index_offgrid(self):
+        """Rebuild the layer buckets from the store's layers and drawing order."""
+        self.offgrid_layers.clear()
+        for offgrid_key in self.offgrid.sorted_by_order(self.offgrid.ids()):
+            self.offgrid_layers.add(offgrid_key, int(self.offgrid.layer[offgrid_key]))
+    
+    def clear_map(self):
+        """Remove every tile and off-grid object, with the selection and undo history that refer to them."""
+        self.tile_map.clear()
+        self.offgrid.clear()
+        self.index_offgrid()
+        self.selected_tiles = set()
+        self.selected_offgrid = set()
+        self.selected_region = None
+        self.history.clear()
+        self.unsaved_edits = 0
+        self.invalidate()
+    
+    def map_locked(self):
+        """Return True, and say so on the status line, while a streamed load is filling the map."""
+        if self.map_loader is None:
+            return False
+        self.set_status("Wait for the map to finish loading")
+        return True
+    
+    def start_map_loading(self, file_path):
+        """Clear the map and start streaming a large JSON map in on a worker thread."""
+        self.clear_map()
+        self.journal = None
+        self.map_loader = MapLoadJob(file_path)
+        self.set_status("Loading map 0%")
+        self.invalidate()
+    
+    def update_map_loading(self):
+        """Insert the batches the map loader has ready, within MAP_LOAD_FRAME_BUDGET ms."""
+        job = self.map_loader
+        if job is None:
+            return
+        
+        deadline = time.perf_counter() + MAP_LOAD_FRAME_BUDGET / 1000
+        while time.perf_counter() < deadline:
+            batch = job.next_batch()
+            if not batch:
+                break
+            try:
+                for section, key, value in batch:
+                    self.insert_map_entry(section, key, value)
+            except (KeyError, TypeError, IndexError, ValueError) as error:
+                # A malformed entry fails the whole load
+                job.cancel()
+                job.error = f"bad {section} entry {key!r}: {error!r}"
+                job.finished = True
+                break
+        
+        if job.finished:
+            self.map_loader = None
+            self.status_text = f"Map load failed: {job.error}" if job.error else "Map loaded"
+            if job.error:
+                # Do not leave a partial map around to be edited and saved over the file
+                self.clear_map()
+            else:
+                self.open_journal(job.file_path)
+            self.game_assets.preload(
+                self.tile_map.type_names + self.offgrid.type_names
+            )
+        else:
+            self.status_text = f"Loading map {job.progress():.0%}"
+        self.invalidate("editor", "tilemap", "tile info", "settings")
+    
+    def insert_map_entry(self, section, key, value):
+        """Insert one (section, key, value) entry of a streamed map."""
+        if section == 'tile_map':
+            tile_x, tile_y = value['pos']
+            self.tile_map.set(int(tile_x), int(tile_y), value['type'], int(value['rotate']))
+        elif section == 'offgrid':
+            self.offgrid_layers.add(self.offgrid.add(value, offgrid_id(key)), value['layer'])
+        elif section == 'tile_size' and value != self.tile_size:
+            self.tile_size = int(value)
+            self.chunk_renderer.reset(self.tile_size)
 
 if __name__ == "__main__":
     editor = Editor()
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('assets', 'assets'), ('Maps', 'Maps'), ('logo.png', '.'), ('Settings.py', '.'), ('text.py', '.'), ('utils.py', '.')],
-    hiddenimports=[],
+    hiddenimports=['numpy'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,58 @@
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+
+def row_runs(match):
+    """Return the runs of True cells of a 2D bool array, row by row.
+
+    Returns (rows, starts, ends, row_first): run i covers row rows[i], columns
+    starts[i] to ends[i] (exclusive), and the runs of row r are
+    row_first[r] to row_first[r + 1].
+    """
+    height, width = match.shape
+    padded = np.zeros((height, width + 2), np.int8)
+    padded[:, 1:-1] = match
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    row_first = np.searchsorted(rows, np.arange(height + 1))
+    return rows, starts, ends, row_first
+
+
+def scanline_fill(match, x, y):
+    """Return the cells 4-connected to (x, y) through True cells of `match`, as a bool array.
+
+    The fill works on horizontal runs rather than cells: each run is visited
+    once from an explicit stack, and the runs it touches in the rows above and
+    below are found by binary search, so large fills neither recurse nor loop
+    over cells in Python.
+    """
+    filled = np.zeros(match.shape, np.bool_)
+    if not match[y, x]:
+        return filled
+
+    rows, starts, ends, row_first = row_runs(match)
+    first = int(row_first[y])
+    start_run = first + int(np.searchsorted(starts[first:row_first[y + 1]], x, "right")) - 1
+    rows, starts, ends, row_first = rows.tolist(), starts.tolist(), ends.tolist(), row_first.tolist()
+
+    visited = bytearray(len(rows))
+    visited[start_run] = 1
+    stack = [start_run]
+    height = match.shape[0]
+    while stack:
+        run = stack.pop()
+        row, start, end = rows[run], starts[run], ends[run]
+        filled[row, start:end] = True
+        for next_row in (row - 1, row + 1):
+            if not 0 <= next_row < height:
+                continue
+            first, last = row_first[next_row], row_first[next_row + 1]
+            # Runs of the next row overlapping [start, end): they end after start and begin before end
+            low = bisect_right(ends, start, first, last)
+            high = bisect_left(starts, end, low, last)
+            for next_run in range(low, high):
+                if not visited[next_run]:
+                    visited[next_run] = 1
+                    stack.append(next_run)
+    return filled
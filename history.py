@@ -0,0 +1,123 @@
+from collections import deque
+import numpy as np
+from Settings import UNDO_MEMORY_LIMIT
+
+# Rough memory cost of one recorded change (the delta tuple plus its before/after states)
+TILE_DELTA_SIZE = 160
+OFFGRID_DELTA_SIZE = 900
+
+
+class EditStep:
+    """One undoable step: (x, y, before, after) tile deltas, (key, before, after) off-grid deltas
+    and (x0, y0, before, after) region deltas.
+
+    Tile states are (type_name, rotate) tuples, off-grid states are copies of
+    the object dict; None means the tile or object did not exist. Region
+    states are the (types, rotations) arrays of TileMap.read_region.
+    """
+    __slots__ = ("tiles", "offgrid", "regions", "size")
+
+    def __init__(self, tiles, offgrid, regions=()):
+        self.tiles = tiles
+        self.offgrid = offgrid
+        self.regions = list(regions)
+        self.size = TILE_DELTA_SIZE * len(tiles) + OFFGRID_DELTA_SIZE * len(offgrid) + sum(
+            before[0].nbytes + before[1].nbytes + after[0].nbytes + after[1].nbytes
+            for _, _, before, after in self.regions
+        )
+
+
+class EditHistory:
+    """Undo/redo stacks of edit deltas, bounded by an approximate memory budget.
+
+    Callers touch an item before changing it; the first touch in the open
+    step records its previous state. close() pairs those with the current
+    states and pushes the changed ones as a single step, so everything done
+    between two closes (such as a whole drag) is undone at once. The oldest
+    steps are dropped when the stacks exceed `memory_limit` bytes.
+    """
+
+    def __init__(self, memory_limit=UNDO_MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self.undo_steps = deque()
+        self.redo_steps = []
+        self.memory_used = 0
+        self.open_tiles = {}  # (x, y) -> state before the open step
+        self.open_offgrid = {}  # key -> state before the open step
+        self.open_regions = []  # (x0, y0, x1, y1, state before the open step)
+
+    def touch_tile(self, tile_map, x, y):
+        if (x, y) not in self.open_tiles:
+            self.open_tiles[(x, y)] = tile_map.get(x, y)
+
+    def touch_offgrid(self, offgrid, offgrid_key):
+        if offgrid_key not in self.open_offgrid:
+            offgrid_data = offgrid.get(offgrid_key)
+            self.open_offgrid[offgrid_key] = dict(offgrid_data) if offgrid_data is not None else None
+
+    def touch_region(self, tile_map, offgrid, x0, y0, x1, y1):
+        """Record a whole tile region before a bulk change.
+
+        The region is captured as arrays rather than per tile; the open step is
+        closed first so single-tile deltas never overlap it.
+        """
+        self.close(tile_map, offgrid)
+        self.open_regions.append((x0, y0, x1, y1, tile_map.read_region(x0, y0, x1, y1)))
+
+    def close(self, tile_map, offgrid):
+        """Turn the changes touched since the last close into an undo step. Returns True if one was added."""
+        if not self.open_tiles and not self.open_offgrid and not self.open_regions:
+            return False
+
+        tiles = []
+        for (x, y), before in self.open_tiles.items():
+            after = tile_map.get(x, y)
+            if after != before:
+                tiles.append((x, y, before, after))
+        offgrid_changes = []
+        for offgrid_key, before in self.open_offgrid.items():
+            after = offgrid.get(offgrid_key)
+            if after != before:
+                offgrid_changes.append((offgrid_key, before, dict(after) if after is not None else None))
+        regions = []
+        for x0, y0, x1, y1, before in self.open_regions:
+            after = tile_map.read_region(x0, y0, x1, y1)
+            if not (np.array_equal(before[0], after[0]) and np.array_equal(before[1], after[1])):
+                regions.append((x0, y0, before, after))
+        self.open_tiles = {}
+        self.open_offgrid = {}
+        self.open_regions = []
+        if not tiles and not offgrid_changes and not regions:
+            return False
+
+        step = EditStep(tiles, offgrid_changes, regions)
+        self.undo_steps.append(step)
+        self.memory_used += step.size - sum(redo_step.size for redo_step in self.redo_steps)
+        self.redo_steps = []
+        while self.memory_used > self.memory_limit and len(self.undo_steps) > 1:
+            self.memory_used -= self.undo_steps.popleft().size
+        return True
+
+    def undo(self):
+        """Pop the latest step onto the redo stack and return it (None if there is nothing to undo)."""
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return step
+
+    def redo(self):
+        """Pop the latest undone step back onto the undo stack and return it."""
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return step
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps = []
+        self.memory_used = 0
+        self.open_tiles = {}
+        self.open_offgrid = {}
+        self.open_regions = []
@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import codecs
+import mmap
+import array
+import struct
+from tilemap import TileMap
+from atomic_file import atomic_write
+
+# Binary map layout (little endian):
+#   header   : magic, version, tile size, chunk size, name count, chunk count, off-grid count
+#   names    : per asset name -> length, utf-8 bytes (type ids index this table)
+#   chunks   : chunk x and y for every chunk (int32 pairs)
+#              then the type arrays of every chunk (uint16, 0 = empty, otherwise id + 1)
+#              then the rotation arrays of every chunk (uint8 quarter turns)
+#   off-grid : one fixed-size record per object in draw order (version 1 records have no id)
+BINARY_MAP_EXTENSION = ".samap"
+JSON_MAP_EXTENSION = ".json"
+MAP_MAGIC = b"SAMP"
+MAP_VERSION = 2
+HEADER_FORMAT = "<4sHHHIII"
+OFFGRID_FORMAT = "<IffiHBf"  # object id, x, y, layer, type id, rotate, size
+OFFGRID_FORMAT_V1 = "<ffiHBf"
+
+
+def save_json_map(file_path, tile_map, offgrid, tile_size):
+    """Write a map in the JSON layout ("x;y" tile dicts plus the off-grid dict)."""
+    with atomic_write(file_path, 'w') as file:
+        json.dump({
+            'tile_map': tile_map.to_dict(),
+            'offgrid': offgrid,
+            'tile_size': tile_size,
+            },
+            file
+            )
+
+
+def load_json_map(file_path, tile_map):
+    """Read a JSON map into `tile_map` and return its remaining state.
+
+    Selection flags stored by older versions of the editor are ignored.
+    `tile_map` is left untouched if the file cannot be loaded.
+    """
+    with open(file_path, 'r') as file:
+        data = json.load(file)
+
+    loaded = TileMap(tile_map.chunk_size)
+    loaded.load_dict(data['tile_map'])
+    tile_map.take(loaded)
+    return {'offgrid': data['offgrid'], 'tile_size': data['tile_size']}
+
+
+class JsonStream:
+    """Reads JSON values one at a time from a file opened in binary mode.
+
+    Only the text that has not been consumed yet is kept in memory, so a huge
+    map can be walked entry by entry.
+    """
+
+    def __init__(self, file, block_size=1024 * 1024):
+        self.file = file
+        self.block_size = block_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.bytes_read = 0
+
+    def fill(self):
+        """Read the next block. Returns False at the end of the file."""
+        data = self.file.read(self.block_size)
+        if not data:
+            return False
+        self.bytes_read += len(data)
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(data)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("unexpected end of map file")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in map file, found {self.buffer[self.pos]!r}")
+        self.pos += 1
+
+    def skip(self, char):
+        """Consume `char` if it is next. Returns True if it was."""
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.fill():
+                    continue
+                raise
+            # A value ending exactly at the end of the buffer (e.g. a number) may continue in the next block
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_map(stream):
+    """Yield the entries of a JSON map from a JsonStream without loading the whole file.
+
+    Entries of the "tile_map" and "offgrid" sections are yielded one by one as
+    (section, key, value); any other top-level item as (name, None, value).
+    """
+    stream.expect("{")
+    while not stream.skip("}"):
+        name = stream.value()
+        stream.expect(":")
+        if name in ("tile_map", "offgrid"):
+            stream.expect("{")
+            while not stream.skip("}"):
+                key = stream.value()
+                stream.expect(":")
+                yield name, key, stream.value()
+                stream.skip(",")
+        else:
+            yield name, None, stream.value()
+        stream.skip(",")
+
+
+def save_binary_map(file_path, tile_map, offgrid, tile_size):
+    """Write a map in the binary layout."""
+    type_names = list(tile_map.type_names)
+    type_ids = dict(tile_map.type_ids)
+    for offgrid_data in offgrid.values():
+        if offgrid_data['type'] not in type_ids:
+            type_ids[offgrid_data['type']] = len(type_names)
+            type_names.append(offgrid_data['type'])
+
+    chunk_positions = array.array("i")
+    types = array.array("H")
+    rotations = array.array("B")
+    for chunk_pos, chunk in tile_map.chunks.items():
+        chunk_positions.extend(chunk_pos)
+        types.extend(chunk.types)
+        rotations.extend(chunk.rotations)
+    if sys.byteorder == "big":
+        chunk_positions.byteswap()
+        types.byteswap()
+
+    with atomic_write(file_path, 'wb') as file:
+        file.write(struct.pack(
+            HEADER_FORMAT, MAP_MAGIC, MAP_VERSION, tile_size, tile_map.chunk_size,
+            len(type_names), len(tile_map.chunks), len(offgrid)
+        ))
+        for name in type_names:
+            name = name.encode("utf-8")
+            file.write(struct.pack("<H", len(name)) + name)
+        file.write(chunk_positions.tobytes())
+        file.write(types.tobytes())
+        file.write(rotations.tobytes())
+        for index, (offgrid_key, offgrid_data) in enumerate(offgrid.items()):
+            object_id = offgrid_key.split(";")[0]
+            file.write(struct.pack(
+                OFFGRID_FORMAT, int(object_id) if object_id.isdigit() else index,
+                offgrid_data['pos'][0], offgrid_data['pos'][1], offgrid_data['layer'],
+                type_ids[offgrid_data['type']], offgrid_data['rotate'] % 4, offgrid_data['size']
+            ))
+
+
+def load_binary_map(file_path, tile_map):
+    """Memory-map a binary map, load its chunks into `tile_map` and return its remaining state.
+
+    The chunks are loaded into a separate map first, so `tile_map` is left
+    untouched if the file turns out to be truncated or corrupt.
+    """
+    loaded = TileMap(tile_map.chunk_size)
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer, \
+            memoryview(buffer) as view:
+        magic, version, tile_size, chunk_size, name_count, chunk_count, offgrid_count = \
+            struct.unpack_from(HEADER_FORMAT, buffer, 0)
+        if magic != MAP_MAGIC or version not in (1, MAP_VERSION):
+            raise ValueError(f"{file_path} is not a binary map or has an unsupported version")
+
+        position = struct.calcsize(HEADER_FORMAT)
+        type_names = []
+        for _ in range(name_count):
+            (name_length,) = struct.unpack_from("<H", buffer, position)
+            type_names.append(buffer[position + 2:position + 2 + name_length].decode("utf-8"))
+            position += 2 + name_length
+
+        area = chunk_size * chunk_size
+        chunk_positions = array.array("i")
+        chunk_positions.frombytes(view[position:position + 8 * chunk_count])
+        types_start = position + 8 * chunk_count
+        rotations_start = types_start + 2 * area * chunk_count
+        position = rotations_start + area * chunk_count
+        if sys.byteorder == "big":
+            chunk_positions.byteswap()
+        record_format = OFFGRID_FORMAT if version == MAP_VERSION else OFFGRID_FORMAT_V1
+        if len(buffer) < position + struct.calcsize(record_format) * offgrid_count:
+            raise ValueError(f"{file_path} is truncated")
+
+        loaded.load_chunks(
+            chunk_size, type_names,
+            (
+                (
+                    (chunk_positions[2 * index], chunk_positions[2 * index + 1]),
+                    view[types_start + 2 * area * index:types_start + 2 * area * (index + 1)],
+                    view[rotations_start + area * index:rotations_start + area * (index + 1)]
+                )
+                for index in range(chunk_count)
+            )
+        )
+
+        offgrid = {}
+        # Unpacked up front so no view of the file outlives the parse if a record is bad
+        records = list(struct.iter_unpack(record_format, view[position:position + struct.calcsize(record_format) * offgrid_count]))
+        for index, record in enumerate(records):
+            if version == 1:
+                record = (index,) + record
+            object_id, x, y, layer, type_id, rotate, size = record
+            offgrid[f"{object_id};{layer}"] = {
+                'pos': [x, y],
+                'layer': layer,
+                'type': type_names[type_id],
+                'rotate': rotate,
+                'size': size
+            }
+
+    tile_map.take(loaded)
+    return {'offgrid': offgrid, 'tile_size': tile_size}
+
+
+def load_map_file(file_path, tile_map):
+    """Load a map in either format, chosen by the file extension."""
+    if file_path.endswith(BINARY_MAP_EXTENSION):
+        return load_binary_map(file_path, tile_map)
+    return load_json_map(file_path, tile_map)
+
+
+def convert_map(source_path, target_path):
+    """Convert a map between the JSON and binary formats (by file extension)."""
+    tile_map = TileMap()
+    data = load_map_file(source_path, tile_map)
+    if target_path.endswith(BINARY_MAP_EXTENSION):
+        save_binary_map(target_path, tile_map, data['offgrid'], data['tile_size'])
+    else:
+        save_json_map(target_path, tile_map, data['offgrid'], data['tile_size'])
+
+
+if __name__ == "__main__":
+    # Converter: python map_format.py Maps/level.json Maps/level.samap (or the other way around)
+    if len(sys.argv) != 3:
+        print(f"usage: python {os.path.basename(__file__)} <source map> <target map>")
+        sys.exit(1)
+    convert_map(sys.argv[1], sys.argv[2])
@@ -0,0 +1,138 @@
+import os
+import json
+import base64
+import numpy as np
+
+JOURNAL_EXTENSION = ".journal"
+
+
+class MapJournal:
+    """Append-only log of the edits made to a map since it was last written in full.
+
+    Edits are recorded by position (tiles) or key (off-grid objects) and
+    written on flush() as one JSON line holding the current state of each
+    edited item, so an item changed many times between flushes costs a
+    single record and replaying a record twice is harmless:
+
+        ["t", x, y, type, rotate]   tile placed or changed
+        ["t", x, y]                 tile removed
+        ["o", key, {...}]           off-grid object added or changed
+        ["o", key]                  off-grid object removed
+        ["r", x, y, width, height, names, types, rotations]
+                                    tile region after a bulk edit; types are
+                                    base64 uint16 indexes into names (None =
+                                    empty), rotations base64 uint8
+
+    Before a full save the log is moved aside (mark_saved) and deleted once
+    the save has succeeded (compacted), so a failed or interrupted save loses
+    nothing: load replays the moved-aside log and then the current one.
+    """
+
+    def __init__(self, map_path):
+        self.map_path = map_path
+        self.path = map_path + JOURNAL_EXTENSION
+        self.old_path = self.path + ".old"
+        self.pending_tiles = {}  # (x, y) -> None, in edit order
+        self.pending_offgrid = {}  # key -> None, in edit order
+        self.pending_regions = []  # (x0, y0, x1, y1)
+        self.records = 0
+
+    def record_tile(self, x, y):
+        self.pending_tiles[(x, y)] = None
+
+    def record_offgrid(self, offgrid_key):
+        self.pending_offgrid[offgrid_key] = None
+
+    def record_region(self, x0, y0, x1, y1):
+        self.pending_regions.append((x0, y0, x1, y1))
+
+    def has_pending(self):
+        return bool(self.pending_tiles or self.pending_offgrid or self.pending_regions)
+
+    def flush(self, tile_map, offgrid):
+        """Append the current state of every item edited since the last flush."""
+        if not self.has_pending():
+            return
+        lines = []
+        for x0, y0, x1, y1 in self.pending_regions:
+            types, rotations = tile_map.read_region(x0, y0, x1, y1)
+            type_ids, indexes = np.unique(types, return_inverse=True)
+            lines.append(json.dumps([
+                "r", x0, y0, x1 - x0, y1 - y0,
+                [tile_map.type_names[type_id - 1] if type_id else None for type_id in type_ids.tolist()],
+                base64.b64encode(indexes.reshape(-1).astype("<u2").tobytes()).decode("ascii"),
+                base64.b64encode(rotations.tobytes()).decode("ascii")
+            ]))
+        for x, y in self.pending_tiles:
+            tile = tile_map.get(x, y)
+            lines.append(json.dumps(["t", x, y, tile[0], tile[1]] if tile else ["t", x, y]))
+        for offgrid_key in self.pending_offgrid:
+            if offgrid_key in offgrid:
+                lines.append(json.dumps(["o", offgrid_key, offgrid[offgrid_key]]))
+            else:
+                lines.append(json.dumps(["o", offgrid_key]))
+        with open(self.path, 'a') as file:
+            file.write("\n".join(lines) + "\n")
+        self.records += len(lines)
+        self.pending_tiles = {}
+        self.pending_offgrid = {}
+        self.pending_regions = []
+
+    def mark_saved(self):
+        """Note that the current map is being saved in full: its pending edits are in the snapshot, so drop them and move the log aside."""
+        self.pending_tiles = {}
+        self.pending_offgrid = {}
+        self.pending_regions = []
+        self.rotate()
+
+    def rotate(self):
+        """Move the log aside before a full save; a log left by a failed save is kept in front."""
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.old_path):
+            with open(self.old_path, 'a') as old_file, open(self.path) as file:
+                old_file.write(file.read())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.old_path)
+        self.records = 0
+
+    def compacted(self):
+        """Drop the moved-aside log once the full save holding its edits has been written."""
+        if os.path.exists(self.old_path):
+            os.remove(self.old_path)
+
+    def replay(self, tile_map, offgrid):
+        """Apply the logged edits to a freshly loaded map. Returns the number of records applied."""
+        applied = 0
+        for path in (self.old_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path) as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # a line cut short by a crash ends the log
+                    if record[0] == "t":
+                        if len(record) == 5:
+                            tile_map.set(record[1], record[2], record[3], record[4])
+                        else:
+                            tile_map.remove(record[1], record[2])
+                    elif record[0] == "o":
+                        if len(record) == 3:
+                            offgrid[record[1]] = record[2]
+                        else:
+                            offgrid.pop(record[1], None)
+                    elif record[0] == "r":
+                        _, x0, y0, width, height, names, types, rotations = record
+                        type_ids = np.array(
+                            [tile_map.type_id(name) + 1 if name is not None else 0 for name in names], np.uint16
+                        )
+                        indexes = np.frombuffer(base64.b64decode(types), "<u2").reshape(height, width)
+                        rotations = np.frombuffer(base64.b64decode(rotations), np.uint8).reshape(height, width)
+                        tile_map.write_region(x0, y0, type_ids[indexes], rotations)
+                    applied += 1
+            if path == self.path:
+                self.records = applied
+        return applied
@@ -0,0 +1,74 @@
+import os
+import queue
+import threading
+from map_format import JsonStream, iter_json_map
+from Settings import MAP_LOAD_BATCH_SIZE, MAP_LOAD_QUEUE_SIZE
+
+
+class MapLoadJob:
+    """Parses a JSON map on a worker thread and hands its entries over in batches.
+
+    The worker streams the file with iter_json_map and puts lists of
+    (section, key, value) entries on a bounded queue, so only a few batches
+    exist at once and the editor inserts them between frames.
+    """
+
+    def __init__(self, file_path, batch_size=MAP_LOAD_BATCH_SIZE):
+        self.file_path = file_path
+        self.file_size = max(1, os.path.getsize(file_path))
+        self.batch_size = batch_size
+        self.batches = queue.Queue(maxsize=MAP_LOAD_QUEUE_SIZE)
+        self.bytes_read = 0
+        self.error = None
+        self.cancelled = False
+        self.finished = False
+        self.thread = threading.Thread(target=self.read, daemon=True)
+        self.thread.start()
+
+    def read(self):
+        """Worker thread: parse the file into batches, then put None to mark the end."""
+        try:
+            with open(self.file_path, 'rb') as file:
+                stream = JsonStream(file)
+                batch = []
+                for entry in iter_json_map(stream):
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        self.bytes_read = stream.bytes_read
+                        if not self.put(batch):
+                            return
+                        batch = []
+                self.bytes_read = self.file_size
+                self.put(batch)
+        except (OSError, ValueError) as error:
+            self.error = error
+        self.put(None)
+
+    def put(self, batch):
+        """Queue a batch, giving up if the job is cancelled while the queue is full."""
+        while not self.cancelled:
+            try:
+                self.batches.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def next_batch(self):
+        """Return the next batch, or None if there is none ready or the job has finished."""
+        if self.finished:
+            return None
+        try:
+            batch = self.batches.get_nowait()
+        except queue.Empty:
+            return None
+        if batch is None:
+            self.finished = True
+        return batch
+
+    def progress(self):
+        """Fraction of the file parsed so far."""
+        return min(1.0, self.bytes_read / self.file_size)
+
+    def cancel(self):
+        self.cancelled = True
@@ -0,0 +1,33 @@
+import threading
+from map_format import save_json_map, save_binary_map, BINARY_MAP_EXTENSION
+
+
+class MapSaveJob:
+    """Writes a snapshot of the map on a worker thread.
+
+    The editor hands over copies of its tile map and off-grid objects, so
+    it can keep editing while the snapshot is serialized.
+    """
+
+    def __init__(self, file_path, tile_map, offgrid, tile_size):
+        self.file_path = file_path
+        self.tile_map = tile_map
+        self.offgrid = offgrid
+        self.tile_size = tile_size
+        self.error = None
+        self.finished = False
+        self.thread = threading.Thread(target=self.write, daemon=True)
+        self.thread.start()
+
+    def write(self):
+        """Worker thread: write the snapshot in the format given by the file extension."""
+        try:
+            if self.file_path.endswith(BINARY_MAP_EXTENSION):
+                save_binary_map(self.file_path, self.tile_map, self.offgrid, self.tile_size)
+            else:
+                save_json_map(self.file_path, self.tile_map, self.offgrid, self.tile_size)
+        except Exception as error:
+            # Any failure ends the job with an error, so the editor can report it and save again
+            self.error = error
+        finally:
+            self.finished = True
@@ -0,0 +1,154 @@
+import numpy as np
+import pygame
+from Settings import MINIMAP_SIZE, EDITOR_BACKGROUND_COLOR
+
+
+class Minimap:
+    """Overview of the whole grid layer at one pixel (or less) per tile.
+
+    Every chunk owns a block of pixels that is redrawn only when the chunk's
+    revision in the TileMap changes, so an edit costs one small block rather
+    than a full redraw. The minimap is laid out again, and redrawn from
+    scratch, only when the map grows past the area it covers.
+
+    A pixel shows the painted tile with the highest type id in its block
+    (so sparse tiles do not vanish when zoomed out), coloured with the
+    average colour of that tile's asset. Once a pixel covers more than one
+    chunk, the pixels of changed chunks are redrawn from every chunk they
+    cover instead.
+    """
+
+    def __init__(self, tile_map, assets, size=MINIMAP_SIZE):
+        self.tile_map = tile_map
+        self.assets = assets
+        self.width, self.height = size
+        self.surface = pygame.Surface(size)
+        self.drawn = {}  # key: (chunk_x, chunk_y) value: revision its block was drawn at
+        self.revision = None  # tile map revision at the last update
+        self.origin = (0, 0)  # tile at the top-left pixel
+        self.scale = 1  # tiles per pixel (a power of two)
+        self.laid_out = False
+        self.reset()
+
+    def reset(self):
+        """Forget everything drawn and the colour table, e.g. after a map load (which renumbers the types)."""
+        self.colors = np.array([EDITOR_BACKGROUND_COLOR[:3]], np.uint8)  # type id + 1 -> colour (0 = empty)
+        self.drawn.clear()
+        self.revision = None
+        self.laid_out = False
+
+    def to_pixels(self, tile_x, tile_y):
+        """Convert tile coordinates to minimap pixels."""
+        return (tile_x - self.origin[0]) / self.scale, (tile_y - self.origin[1]) / self.scale
+
+    def to_tiles(self, pixel_x, pixel_y):
+        """Convert minimap pixels to tile coordinates."""
+        return pixel_x * self.scale + self.origin[0], pixel_y * self.scale + self.origin[1]
+
+    def chunk_rect(self, chunk_pos):
+        """Return the block of pixels a chunk is drawn into."""
+        size = self.tile_map.chunk_size
+        block = max(1, size // self.scale)
+        return pygame.Rect(
+            (chunk_pos[0] * size - self.origin[0]) // self.scale,
+            (chunk_pos[1] * size - self.origin[1]) // self.scale,
+            block, block
+        )
+
+    def update(self):
+        """Redraw the blocks of the chunks that changed since the last update."""
+        if self.tile_map.revision == self.revision:
+            return
+        self.revision = self.tile_map.revision
+        chunks = self.tile_map.chunks
+        bounds = self.surface.get_rect()
+
+        if not self.laid_out or not all(
+            bounds.contains(self.chunk_rect(chunk_pos)) for chunk_pos in chunks if chunk_pos not in self.drawn
+        ):
+            self.lay_out()
+
+        shared_pixels = self.scale > self.tile_map.chunk_size
+        pixels = set()  # pixels to redraw when chunks share them
+        for chunk_pos in [chunk_pos for chunk_pos in self.drawn if chunk_pos not in chunks]:
+            if shared_pixels:
+                pixels.add(self.chunk_rect(chunk_pos).topleft)
+            else:
+                self.surface.fill(self.colors[0], self.chunk_rect(chunk_pos))
+            del self.drawn[chunk_pos]
+
+        for chunk_pos, chunk in chunks.items():
+            if self.drawn.get(chunk_pos) != chunk.revision:
+                if shared_pixels:
+                    pixels.add(self.chunk_rect(chunk_pos).topleft)
+                else:
+                    self.draw_chunk(chunk_pos, chunk)
+                self.drawn[chunk_pos] = chunk.revision
+
+        for pixel in pixels:
+            self.draw_pixel(pixel)
+
+    def lay_out(self):
+        """Fit the painted area, with room to grow, into the minimap and clear it."""
+        size = self.tile_map.chunk_size
+        chunk_xs = [chunk_pos[0] for chunk_pos in self.tile_map.chunks] or [0]
+        chunk_ys = [chunk_pos[1] for chunk_pos in self.tile_map.chunks] or [0]
+        # A quarter of the painted size (at least a chunk) is kept free around it
+        margin_x = max(1, (max(chunk_xs) - min(chunk_xs) + 1) // 4)
+        margin_y = max(1, (max(chunk_ys) - min(chunk_ys) + 1) // 4)
+        left, right = (min(chunk_xs) - margin_x) * size, (max(chunk_xs) + 1 + margin_x) * size
+        top, bottom = (min(chunk_ys) - margin_y) * size, (max(chunk_ys) + 1 + margin_y) * size
+
+        self.scale = 1
+        while (right - left) / self.scale > self.width - 1 or (bottom - top) / self.scale > self.height - 1:
+            self.scale *= 2
+        # Center the area; the origin stays on a multiple of the scale so chunk blocks land on whole pixels
+        self.origin = (
+            ((left + right) // 2 - self.width * self.scale // 2) // self.scale * self.scale,
+            ((top + bottom) // 2 - self.height * self.scale // 2) // self.scale * self.scale
+        )
+        self.surface.fill(self.colors[0])
+        self.drawn.clear()
+        self.laid_out = True
+
+    def tile_colors(self):
+        """Return the colour table, adding the average colours of newly used assets."""
+        type_names = self.tile_map.type_names
+        if len(self.colors) <= len(type_names):
+            new_colors = [
+                pygame.transform.average_color(self.assets[type_name])[:3]
+                for type_name in type_names[len(self.colors) - 1:]
+            ]
+            self.colors = np.concatenate([self.colors, np.array(new_colors, np.uint8).reshape(-1, 3)])
+        return self.colors
+
+    def draw_pixel(self, pixel):
+        """Redraw a pixel covering several chunks from the highest type id among all of them."""
+        size = self.tile_map.chunk_size
+        chunks = self.tile_map.chunks
+        per_pixel = self.scale // size
+        chunk_x0 = (self.origin[0] + pixel[0] * self.scale) // size
+        chunk_y0 = (self.origin[1] + pixel[1] * self.scale) // size
+        if per_pixel * per_pixel > len(chunks):
+            covered = [
+                chunk for (chunk_x, chunk_y), chunk in chunks.items()
+                if chunk_x0 <= chunk_x < chunk_x0 + per_pixel and chunk_y0 <= chunk_y < chunk_y0 + per_pixel
+            ]
+        else:
+            covered = [
+                chunks[(chunk_x, chunk_y)]
+                for chunk_y in range(chunk_y0, chunk_y0 + per_pixel)
+                for chunk_x in range(chunk_x0, chunk_x0 + per_pixel)
+                if (chunk_x, chunk_y) in chunks
+            ]
+        top_type = max((int(np.frombuffer(chunk.types, np.uint16).max()) for chunk in covered), default=0)
+        self.surface.set_at(pixel, self.tile_colors()[top_type])
+
+    def draw_chunk(self, chunk_pos, chunk):
+        size = self.tile_map.chunk_size
+        step = min(self.scale, size)
+        block = size // step
+        types = np.frombuffer(chunk.types, np.uint16).reshape(block, step, block, step).max(axis=(1, 3))
+        rect = self.chunk_rect(chunk_pos)
+        # surfarray indexes pixels as [x, y]
+        pygame.surfarray.blit_array(self.surface.subsurface(rect), self.tile_colors()[types].transpose(1, 0, 2))
@@ -0,0 +1,88 @@
+import bisect
+
+
+class LayerBuckets:
+    """Off-grid object keys grouped by layer, in drawing order.
+
+    Each layer keeps its keys in the order they were put on it (a dict used
+    as an ordered set) and the layer numbers are kept sorted, so moving an
+    object to another layer is O(1) unless that layer is new, and layers can
+    be any integers, negative or far apart.
+    """
+
+    def __init__(self):
+        self.layers = {}  # key: layer value: {object key: None} in drawing order
+        self.sorted_layers = []  # layers that hold objects, lowest first
+        self.key_layers = {}  # key: object key value: its layer
+
+    def __len__(self):
+        return len(self.key_layers)
+
+    def __contains__(self, key):
+        return key in self.key_layers
+
+    def __iter__(self):
+        """Yield every key in drawing order (lowest layer first)."""
+        for layer in self.sorted_layers:
+            yield from self.layers[layer]
+
+    def layer_of(self, key):
+        return self.key_layers.get(key)
+
+    def add(self, key, layer):
+        """Put a key on top of a layer, taking it off its current layer first."""
+        if key in self.key_layers:
+            self.remove(key)
+        bucket = self.layers.get(layer)
+        if bucket is None:
+            bucket = self.layers[layer] = {}
+            bisect.insort(self.sorted_layers, layer)
+        bucket[key] = None
+        self.key_layers[key] = layer
+
+    def remove(self, key):
+        layer = self.key_layers.pop(key, None)
+        if layer is None:
+            return
+        bucket = self.layers[layer]
+        del bucket[key]
+        if not bucket:
+            del self.layers[layer]
+            del self.sorted_layers[bisect.bisect_left(self.sorted_layers, layer)]
+
+    def clear(self):
+        self.layers = {}
+        self.sorted_layers = []
+        self.key_layers = {}
+
+    def keys_slice(self, start, stop):
+        """Yield the keys at drawing positions start <= i < stop, skipping whole layers before `start`."""
+        index = 0
+        for layer in self.sorted_layers:
+            bucket = self.layers[layer]
+            if index >= stop:
+                return
+            if index + len(bucket) <= start:
+                index += len(bucket)
+                continue
+            for key in bucket:
+                if index >= stop:
+                    return
+                if index >= start:
+                    yield key
+                index += 1
+
+    def draw_order(self, keys):
+        """Return `keys` grouped by layer, lowest layer first, keeping their order within a layer."""
+        by_layer = {}
+        for key in keys:
+            by_layer.setdefault(self.key_layers[key], []).append(key)
+        if len(by_layer) <= 1:
+            return list(keys)
+
+        # Walk the few layers that are present, or all layers when most of them are
+        if len(by_layer) * 8 < len(self.sorted_layers):
+            layers = sorted(by_layer)
+        else:
+            layers = [layer for layer in self.sorted_layers if layer in by_layer]
+        return [key for layer in layers for key in by_layer[layer]]
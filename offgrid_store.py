@@ -0,0 +1,288 @@
+import heapq
+from collections.abc import MutableMapping
+import numpy as np
+from Settings import SPATIAL_CELL_SIZE
+
+# Column name -> dtype; an object's ID is its row
+COLUMNS = {
+    "x": np.float64,
+    "y": np.float64,
+    "width": np.float64,  # world size of the object (asset size * size)
+    "height": np.float64,
+    "rotate": np.int64,
+    "size": np.float64,
+    "layer": np.int64,
+    "type_id": np.int32,
+    "order": np.int64,  # drawing order within a layer
+    "alive": np.bool_,
+    "cell_x0": np.int64,  # range of hit-test cells the object is bucketed in
+    "cell_y0": np.int64,
+    "cell_x1": np.int64,
+    "cell_y1": np.int64,
+}
+
+
+def offgrid_id(offgrid_key):
+    """Return the object ID stored in a map file key ("id;layer"), or None if it has none."""
+    head = str(offgrid_key).split(";")[0]
+    return int(head) if head.isdigit() else None
+
+
+class OffgridStore(MutableMapping):
+    """Off-grid objects stored column by column in NumPy arrays.
+
+    Objects are addressed by stable integer IDs (their row). IDs of removed
+    objects are handed out again lowest first, which is safe for undo and the
+    journal because both replay changes in order. Bulk operations (moving,
+    rotating, resizing, hit tests) run on whole columns.
+
+    Hit tests only look at the objects bucketed in the grid cells
+    (SPATIAL_CELL_SIZE pixels) that the queried point or rect overlaps; an
+    object is re-bucketed whenever its rect moves into other cells.
+
+    As a mapping it reads and writes objects in the map file layout:
+    {pos, layer, type, rotate, size}.
+    """
+
+    def __init__(self, get_size, capacity=256, cell_size=SPATIAL_CELL_SIZE):
+        self.get_size = get_size  # asset name -> (width, height)
+        self.cell_size = cell_size
+        self.cells = {}  # key: (cell_x, cell_y) value: set of IDs
+        self.type_names = []  # type id -> asset name
+        self.type_ids = {}  # asset name -> type id
+        self.type_widths = np.zeros(0, np.float64)
+        self.type_heights = np.zeros(0, np.float64)
+        self.capacity = capacity
+        for name, dtype in COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype))
+        self.end = 0  # rows in use are below this
+        self.count = 0
+        self.free_ids = []  # heap of removed IDs below `end`
+        self.next_order = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, object_id):
+        return isinstance(object_id, (int, np.integer)) and 0 <= object_id < self.end and bool(self.alive[object_id])
+
+    def __iter__(self):
+        """Yield the IDs of all objects in ID order."""
+        return iter(self.ids().tolist())
+
+    def __getitem__(self, object_id):
+        if object_id not in self:
+            raise KeyError(object_id)
+        return {
+            'pos': [float(self.x[object_id]), float(self.y[object_id])],
+            'layer': int(self.layer[object_id]),
+            'type': self.type_names[self.type_id[object_id]],
+            'rotate': int(self.rotate[object_id]),
+            'size': float(self.size[object_id])
+        }
+
+    def __setitem__(self, object_id, offgrid):
+        """Add or replace an object under a given ID.
+
+        Every field is read before the ID is touched, so a malformed object
+        raises without leaving a half-written row behind.
+        """
+        type_id = self.type_id_of(offgrid['type'])
+        x, y = offgrid['pos']
+        layer = int(offgrid['layer'])
+        rotate = int(offgrid['rotate'])
+        size = float(offgrid['size'])
+
+        if object_id in self:
+            self.unlink(object_id)
+        if object_id not in self:
+            self.claim(object_id)
+            self.order[object_id] = self.next_order
+            self.next_order += 1
+        elif layer != self.layer[object_id]:
+            # A new layer puts the object on top of it
+            self.order[object_id] = self.next_order
+            self.next_order += 1
+
+        self.x[object_id], self.y[object_id] = x, y
+        self.layer[object_id] = layer
+        self.type_id[object_id] = type_id
+        self.rotate[object_id] = rotate
+        self.size[object_id] = size
+        self.width[object_id] = self.type_widths[type_id] * size
+        self.height[object_id] = self.type_heights[type_id] * size
+        self.link(object_id)
+
+    def __delitem__(self, object_id):
+        if object_id not in self:
+            raise KeyError(object_id)
+        self.unlink(object_id)
+        self.alive[object_id] = False
+        self.count -= 1
+        heapq.heappush(self.free_ids, object_id)
+
+    def type_id_of(self, type_name):
+        """Return the numeric id of an asset name, registering it (and its size) if needed."""
+        if type_name not in self.type_ids:
+            width, height = self.get_size(type_name)
+            self.type_ids[type_name] = len(self.type_names)
+            self.type_names.append(type_name)
+            self.type_widths = np.append(self.type_widths, width)
+            self.type_heights = np.append(self.type_heights, height)
+        return self.type_ids[type_name]
+
+    def grow(self, capacity):
+        """Enlarge every column to hold at least `capacity` rows."""
+        capacity = max(capacity, self.capacity * 2)
+        for name, dtype in COLUMNS.items():
+            column = np.zeros(capacity, dtype)
+            column[:self.end] = getattr(self, name)[:self.end]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def claim(self, object_id):
+        """Mark a free ID as used."""
+        if object_id >= self.end:
+            if object_id >= self.capacity:
+                self.grow(object_id + 1)
+            for free_id in range(self.end, object_id):
+                heapq.heappush(self.free_ids, free_id)
+            self.end = object_id + 1
+        else:
+            self.free_ids.remove(object_id)
+            heapq.heapify(self.free_ids)
+        self.alive[object_id] = True
+        self.count += 1
+
+    def new_id(self):
+        """Return the ID a new object should use."""
+        return self.free_ids[0] if self.free_ids else self.end
+
+    def add(self, offgrid, object_id=None):
+        """Add an object (under `object_id` if that ID is free) and return its ID."""
+        if object_id is None or object_id in self:
+            object_id = self.new_id()
+        self[object_id] = offgrid
+        return object_id
+
+    def clear(self):
+        self.cells = {}
+        self.alive[:self.end] = False
+        self.end = 0
+        self.count = 0
+        self.free_ids = []
+
+    def ids(self):
+        """Return the IDs of all objects as an array."""
+        return np.flatnonzero(self.alive[:self.end])
+
+    def set_layer(self, object_id, layer):
+        """Move an object to another layer, on top of the objects already on it."""
+        self.layer[object_id] = layer
+        self.order[object_id] = self.next_order
+        self.next_order += 1
+
+    def cell_bounds(self, ids):
+        """Return the (x0, y0, x1, y1) ranges of cells the rects of `ids` overlap, as arrays."""
+        cell_size = self.cell_size
+        return (
+            np.floor_divide(self.x[ids], cell_size).astype(np.int64),
+            np.floor_divide(self.y[ids], cell_size).astype(np.int64),
+            np.floor_divide(self.x[ids] + self.width[ids], cell_size).astype(np.int64),
+            np.floor_divide(self.y[ids] + self.height[ids], cell_size).astype(np.int64)
+        )
+
+    def link(self, object_id):
+        """Bucket an object in the cells its rect overlaps."""
+        bounds = self.cell_bounds(object_id)
+        self.cell_x0[object_id], self.cell_y0[object_id], self.cell_x1[object_id], self.cell_y1[object_id] = bounds
+        for cell_y in range(int(bounds[1]), int(bounds[3]) + 1):
+            for cell_x in range(int(bounds[0]), int(bounds[2]) + 1):
+                self.cells.setdefault((cell_x, cell_y), set()).add(object_id)
+
+    def unlink(self, object_id):
+        """Take an object out of the cells it is bucketed in."""
+        for cell_y in range(int(self.cell_y0[object_id]), int(self.cell_y1[object_id]) + 1):
+            for cell_x in range(int(self.cell_x0[object_id]), int(self.cell_x1[object_id]) + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket is not None:
+                    bucket.discard(object_id)
+                    if not bucket:
+                        del self.cells[(cell_x, cell_y)]
+
+    def relink(self, ids):
+        """Re-bucket the objects among `ids` whose rects moved into other cells."""
+        x0, y0, x1, y1 = self.cell_bounds(ids)
+        changed = (
+            (x0 != self.cell_x0[ids]) | (y0 != self.cell_y0[ids])
+            | (x1 != self.cell_x1[ids]) | (y1 != self.cell_y1[ids])
+        )
+        for object_id in np.asarray(ids)[changed].tolist():
+            self.unlink(object_id)
+            self.link(object_id)
+
+    def move(self, ids, xs, ys):
+        self.x[ids] = xs
+        self.y[ids] = ys
+        self.relink(ids)
+
+    def rotate_by(self, ids, turns=1):
+        self.rotate[ids] += turns
+
+    def resize(self, ids, size):
+        self.size[ids] = size
+        self.width[ids] = self.type_widths[self.type_id[ids]] * size
+        self.height[ids] = self.type_heights[self.type_id[ids]] * size
+        self.relink(ids)
+
+    def sorted_by_order(self, ids):
+        return ids[np.argsort(self.order[ids], kind="stable")].tolist()
+
+    def candidates(self, left, top, right, bottom):
+        """Return the IDs bucketed in the cells overlapping a box, as an array."""
+        cell_size = self.cell_size
+        cell_x0, cell_y0 = int(left // cell_size), int(top // cell_size)
+        cell_x1, cell_y1 = int(right // cell_size), int(bottom // cell_size)
+        found = set()
+        if (cell_x1 - cell_x0 + 1) * (cell_y1 - cell_y0 + 1) > len(self.cells):
+            # A box covering more cells than are in use: walk the used cells instead
+            for (cell_x, cell_y), bucket in self.cells.items():
+                if cell_x0 <= cell_x <= cell_x1 and cell_y0 <= cell_y <= cell_y1:
+                    found.update(bucket)
+        else:
+            for cell_y in range(cell_y0, cell_y1 + 1):
+                for cell_x in range(cell_x0, cell_x1 + 1):
+                    bucket = self.cells.get((cell_x, cell_y))
+                    if bucket:
+                        found.update(bucket)
+        return np.fromiter(found, np.int64, len(found))
+
+    def query_point(self, x, y):
+        """Return the IDs of objects whose rect contains a point, in drawing order within a layer."""
+        ids = self.candidates(x, y, x, y)
+        left = self.x[ids]
+        top = self.y[ids]
+        hits = ids[
+            (left <= x) & (x < left + self.width[ids])
+            & (top <= y) & (y < top + self.height[ids])
+        ]
+        return self.sorted_by_order(hits)
+
+    def query_rect(self, rect):
+        """Return the IDs of objects overlapping a pygame Rect, in drawing order within a layer."""
+        ids = self.candidates(rect.left, rect.top, rect.right, rect.bottom)
+        left = self.x[ids]
+        top = self.y[ids]
+        hits = ids[
+            (left < rect.right) & (rect.left < left + self.width[ids])
+            & (top < rect.bottom) & (rect.top < top + self.height[ids])
+        ]
+        return self.sorted_by_order(hits)
+
+    def to_dict(self, ids):
+        """Return the objects `ids` in the map file layout, keyed "id;layer"."""
+        result = {}
+        for object_id in ids:
+            offgrid = self[object_id]
+            result[f"{object_id};{offgrid['layer']}"] = offgrid
+        return result
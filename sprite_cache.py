@@ -0,0 +1,63 @@
+from collections import OrderedDict
+import pygame
+from Settings import SPRITE_CACHE_SIZE
+
+
+class SpriteCache:
+    """Bounded LRU cache of rotated, scaled and faded variants of the game assets."""
+
+    def __init__(self, assets, max_size=SPRITE_CACHE_SIZE):
+        self.assets = assets
+        self.max_size = max_size
+        self.variants = OrderedDict()  # key: (asset_key, quarter_turns, size, alpha) value: Surface
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, asset_key, rotate=0, size=None, alpha=None):
+        """Return the asset rotated by `rotate` quarter turns and scaled to `size`."""
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (asset_key, rotate % 4, size, alpha)
+
+        image = self.variants.get(key)
+        if image is not None:
+            self.hits += 1
+            self.variants.move_to_end(key)
+            return image
+
+        self.misses += 1
+        image = self.assets[asset_key]
+        if rotate % 4:
+            image = pygame.transform.rotate(image, (rotate % 4) * 90)
+        if size is not None and size != image.get_size():
+            image = pygame.transform.scale(image, size)
+        if alpha is not None:
+            image = image.copy()
+            image.set_alpha(alpha)
+
+        self.variants[key] = image
+        if len(self.variants) > self.max_size:
+            self.variants.popitem(last=False)
+            self.evictions += 1
+        return image
+
+    def clear(self):
+        self.variants.clear()
+
+    def drop_asset(self, asset_key):
+        """Forget every variant of an asset, e.g. once the asset registry has evicted it.
+
+        The unmodified variant is the asset's own surface, so keeping it would
+        hold on to memory the registry has given up.
+        """
+        for key in [key for key in self.variants if key[0] == asset_key]:
+            del self.variants[key]
+
+    def stats(self):
+        return {
+            "size": len(self.variants),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -1,4 +1,35 @@
 import pygame
+from collections import OrderedDict
+from Settings import TEXT_CACHE_SIZE
+
+class TextCache :
+  """Bounded LRU cache of rendered text surfaces shared by every panel."""
+  def __init__(self,max_size=TEXT_CACHE_SIZE):
+    self.max_size = max_size
+    self.surfaces = OrderedDict() # key: (font, text, antialias, color) value: Surface
+    self.hits = 0
+    self.misses = 0
+
+  def render(self,font,text,antialias,color):
+    key = (font,text,antialias,tuple(color))
+    surface = self.surfaces.get(key)
+    if surface is not None :
+      self.hits += 1
+      self.surfaces.move_to_end(key)
+      return surface
+
+    self.misses += 1
+    surface = font.render(text,antialias,color)
+    self.surfaces[key] = surface
+    if len(self.surfaces) > self.max_size :
+      self.surfaces.popitem(last=False)
+    return surface
+
+text_cache = TextCache()
+
+def render_text(font,text,antialias,color):
+  """Render text through the shared cache. The returned surface must not be modified."""
+  return text_cache.render(font,text,antialias,color)
 
 class Text :
   def __init__(self,pos,width,height,font,text=""):
@@ -13,37 +44,49 @@ class Text :
     self.text_color = self.text_inactive_color
     self.color = self.inactive_color
     self.stats = False
-    self.text_surface = self.font.render(self.text,True,self.color)
+    self.rendered = None # (text, color) of the current text_surface
+    self.refresh()
+
+  def refresh(self):
+    # Re-render only when the text or its color changed
+    if self.rendered != (self.text,self.text_color) :
+      self.text_surface = render_text(self.font,self.text,True,self.text_color)
+      self.rendered = (self.text,self.text_color)
 
   def type_txt(self,key,type = "str") :
     if type == 'str' :
       if key.unicode in ["q","w","e","r","t","y","u","i","o","p","a","s","d","f","g","h","j","k","l","z","x","c","v","b","n","m"," ","1","2","3","4","5","6","7","8","9","0","-","_"] :
         self.text += key.unicode
-        self.text_surface = self.font.render(self.text,True,self.text_color)
     elif type == 'int' :
       if key.unicode in ['1','2','3','4','5','6','7','8','9','0','.'] :
         self.text += key.unicode
-        self.text_surface = self.font.render(self.text,True,self.text_color)
+      elif key.unicode == '-' and not self.text :
+        self.text += key.unicode
 
     if key.key == pygame.K_BACKSPACE :
       self.text = self.text[:-1]
-      self.text_surface = self.font.render(self.text,True,(0,0,0))
+    self.refresh()
       
 
   def update(self):
+    # Returns True when the box looks different than it did before the call
+    changed = self.color != (self.active_color if self.stats else self.inactive_color)
     if self.stats :
       self.color = self.active_color
       self.text_color = self.text_active_color
-      self.text_surface = self.font.render(self.text,True,self.text_color)
     else :
       self.color = self.inactive_color
       self.text_color = self.text_inactive_color
-      self.text_surface = self.font.render(self.text,True,self.text_color)
+    self.refresh()
 
     if self.width < self.text_surface.get_width() + 10 :
       self.text = self.text[:-1]
-      self.text_surface = self.font.render(self.text,True,self.text_color)
+      self.refresh()
+      changed = True
+
+    return changed
 
   def render(self,surf):
+    self.refresh()
     pygame.draw.rect(surf, self.color, self.rect)
     surf.blit(self.text_surface, (self.rect.x + 5, self.rect.y + 5))
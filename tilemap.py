@@ -0,0 +1,386 @@
+import sys
+import array
+import numpy as np
+from flood_fill import scanline_fill
+from Settings import CHUNK_SIZE
+
+
+class Chunk:
+    """A fixed-size square of grid tiles stored as flat integer arrays."""
+    __slots__ = ("types", "rotations", "count", "revision")
+
+    def __init__(self, size):
+        area = size * size
+        self.types = array.array("H", bytes(2 * area))  # 0 = empty, otherwise type id + 1
+        self.rotations = array.array("B", bytes(area))  # quarter turns (0-3)
+        self.count = 0
+        self.revision = 0
+
+
+class TileMap:
+    """Chunked storage for grid tiles.
+
+    Tiles are addressed by integer tile coordinates and grouped into
+    CHUNK_SIZE x CHUNK_SIZE chunks keyed by chunk coordinate, so memory scales
+    with the painted area instead of one Python object per tile.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunks = {}  # key: (chunk_x, chunk_y) value: Chunk
+        self.type_names = []  # type id -> asset name
+        self.type_ids = {}  # asset name -> type id
+        self.count = 0
+        self.revision = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, pos):
+        chunk, index = self.locate(pos[0], pos[1])
+        return chunk is not None and chunk.types[index] != 0
+
+    def __iter__(self):
+        """Yield (x, y, type_name, rotate) for every tile."""
+        for chunk_pos in self.chunks:
+            yield from self.chunk_tiles(chunk_pos)
+
+    def type_id(self, type_name):
+        """Return the numeric id of an asset name, registering it if needed."""
+        if type_name not in self.type_ids:
+            self.type_ids[type_name] = len(self.type_names)
+            self.type_names.append(type_name)
+        return self.type_ids[type_name]
+
+    def locate(self, x, y):
+        """Return (chunk, index) for a tile position; chunk is None if unpainted."""
+        chunk_x, local_x = divmod(x, self.chunk_size)
+        chunk_y, local_y = divmod(y, self.chunk_size)
+        return self.chunks.get((chunk_x, chunk_y)), local_y * self.chunk_size + local_x
+
+    def get(self, x, y):
+        """Return (type_name, rotate) of the tile at (x, y), or None."""
+        chunk, index = self.locate(x, y)
+        if chunk is None or chunk.types[index] == 0:
+            return None
+        return self.type_names[chunk.types[index] - 1], chunk.rotations[index]
+
+    def set(self, x, y, type_name, rotate=0):
+        """Place (or replace) a tile."""
+        chunk, index = self.locate(x, y)
+        if chunk is None:
+            chunk = Chunk(self.chunk_size)
+            self.chunks[(x // self.chunk_size, y // self.chunk_size)] = chunk
+
+        if chunk.types[index] == 0:
+            chunk.count += 1
+            self.count += 1
+        chunk.types[index] = self.type_id(type_name) + 1
+        chunk.rotations[index] = rotate % 4
+        self.touch(chunk)
+
+    def remove(self, x, y):
+        """Remove the tile at (x, y). Returns True if a tile was removed."""
+        chunk, index = self.locate(x, y)
+        if chunk is None or chunk.types[index] == 0:
+            return False
+
+        chunk.types[index] = 0
+        chunk.rotations[index] = 0
+        chunk.count -= 1
+        self.count -= 1
+        if chunk.count == 0:
+            del self.chunks[(x // self.chunk_size, y // self.chunk_size)]
+        self.touch(chunk)
+        return True
+
+    def rotate(self, x, y, turns=1):
+        """Rotate the tile at (x, y) by a number of quarter turns."""
+        chunk, index = self.locate(x, y)
+        if chunk is not None and chunk.types[index] != 0:
+            chunk.rotations[index] = (chunk.rotations[index] + turns) % 4
+            self.touch(chunk)
+
+    def touch(self, chunk):
+        """Record that a chunk changed."""
+        self.revision += 1
+        chunk.revision = self.revision
+
+    def clear(self):
+        self.chunks = {}
+        self.count = 0
+        self.revision += 1
+
+    def take(self, other):
+        """Replace the contents with the tiles of `other`, a map with the same chunk size that is dropped afterwards.
+
+        Every chunk gets a fresh revision of this map, so caches keyed on
+        chunk revisions never mistake a taken chunk for one they drew.
+        """
+        self.chunks = other.chunks
+        self.type_names = other.type_names
+        self.type_ids = other.type_ids
+        self.count = other.count
+        self.revision += 1
+        for chunk in self.chunks.values():
+            self.touch(chunk)
+
+    def copy(self):
+        """Return an independent copy (the chunk arrays are copied, not shared)."""
+        tile_map = TileMap(self.chunk_size)
+        tile_map.type_names = list(self.type_names)
+        tile_map.type_ids = dict(self.type_ids)
+        for chunk_pos, chunk in self.chunks.items():
+            copy = Chunk.__new__(Chunk)
+            copy.types = array.array("H", chunk.types)
+            copy.rotations = array.array("B", chunk.rotations)
+            copy.count = chunk.count
+            copy.revision = chunk.revision
+            tile_map.chunks[chunk_pos] = copy
+        tile_map.count = self.count
+        tile_map.revision = self.revision
+        return tile_map
+
+    def chunk_tiles(self, chunk_pos):
+        """Yield (x, y, type_name, rotate) for every tile in one chunk."""
+        chunk = self.chunks[chunk_pos]
+        size = self.chunk_size
+        base_x = chunk_pos[0] * size
+        base_y = chunk_pos[1] * size
+        types = chunk.types
+        for index in range(size * size):
+            if types[index]:
+                local_y, local_x = divmod(index, size)
+                yield (base_x + local_x, base_y + local_y,
+                       self.type_names[types[index] - 1], chunk.rotations[index])
+
+    def tiles_slice(self, start, stop):
+        """Yield the tiles at iteration positions start <= i < stop.
+
+        Whole chunks before `start` are skipped by their tile count.
+        """
+        index = 0
+        for chunk_pos, chunk in self.chunks.items():
+            if index >= stop:
+                return
+            if index + chunk.count <= start:
+                index += chunk.count
+                continue
+            for tile in self.chunk_tiles(chunk_pos):
+                if index >= stop:
+                    return
+                if index >= start:
+                    yield tile
+                index += 1
+
+    def chunks_in_region(self, x0, y0, x1, y1):
+        """Return the positions of painted chunks overlapping a tile region.
+
+        The region covers tiles x0 <= x < x1 and y0 <= y < y1.
+        """
+        size = self.chunk_size
+        chunk_x0, chunk_y0 = x0 // size, y0 // size
+        chunk_x1, chunk_y1 = -(-x1 // size), -(-y1 // size)
+
+        # Probe the covered chunk coordinates unless there are fewer painted chunks than that
+        if (chunk_x1 - chunk_x0) * (chunk_y1 - chunk_y0) <= len(self.chunks):
+            return [
+                (chunk_x, chunk_y)
+                for chunk_y in range(chunk_y0, chunk_y1)
+                for chunk_x in range(chunk_x0, chunk_x1)
+                if (chunk_x, chunk_y) in self.chunks
+            ]
+        return [
+            chunk_pos for chunk_pos in self.chunks
+            if chunk_x0 <= chunk_pos[0] < chunk_x1 and chunk_y0 <= chunk_pos[1] < chunk_y1
+        ]
+
+    def tiles_in_region(self, x0, y0, x1, y1):
+        """Yield (x, y, type_name, rotate) for tiles with x0 <= x < x1 and y0 <= y < y1."""
+        for chunk_pos in self.chunks_in_region(x0, y0, x1, y1):
+            for tile in self.chunk_tiles(chunk_pos):
+                if x0 <= tile[0] < x1 and y0 <= tile[1] < y1:
+                    yield tile
+
+    def count_region(self, x0, y0, x1, y1):
+        """Return the number of tiles with x0 <= x < x1 and y0 <= y < y1."""
+        count = 0
+        for _, chunk, local, _ in self.region_blocks(x0, y0, x1, y1):
+            count += int(np.count_nonzero(self.chunk_views(chunk)[0][local]))
+        return count
+
+    def region_blocks(self, x0, y0, x1, y1, create=False):
+        """Yield (chunk_pos, chunk, local, region) for the chunks overlapping a tile region.
+
+        `local` indexes the chunk's (size, size) arrays and `region` the
+        region's (y1 - y0, x1 - x0) arrays, both as (rows, columns) slices.
+        Unpainted chunks are skipped, or created if `create` is set.
+        """
+        size = self.chunk_size
+        if create:
+            chunk_positions = [
+                (chunk_x, chunk_y)
+                for chunk_y in range(y0 // size, -(-y1 // size))
+                for chunk_x in range(x0 // size, -(-x1 // size))
+            ]
+        else:
+            chunk_positions = self.chunks_in_region(x0, y0, x1, y1)
+
+        for chunk_pos in chunk_positions:
+            chunk = self.chunks.get(chunk_pos)
+            if chunk is None:
+                chunk = self.chunks[chunk_pos] = Chunk(size)
+            base_x = chunk_pos[0] * size
+            base_y = chunk_pos[1] * size
+            left, right = max(x0, base_x), min(x1, base_x + size)
+            top, bottom = max(y0, base_y), min(y1, base_y + size)
+            yield (
+                chunk_pos, chunk,
+                (slice(top - base_y, bottom - base_y), slice(left - base_x, right - base_x)),
+                (slice(top - y0, bottom - y0), slice(left - x0, right - x0))
+            )
+
+    def chunk_views(self, chunk):
+        """Return writable (size, size) NumPy views of a chunk's type and rotation arrays."""
+        size = self.chunk_size
+        return (
+            np.frombuffer(chunk.types, np.uint16).reshape(size, size),
+            np.frombuffer(chunk.rotations, np.uint8).reshape(size, size)
+        )
+
+    def recount(self, chunk_pos, chunk):
+        """Update a chunk's tile count after a region write, dropping it if it became empty."""
+        count = len(chunk.types) - chunk.types.count(0)
+        self.count += count - chunk.count
+        chunk.count = count
+        if count == 0:
+            del self.chunks[chunk_pos]
+        self.touch(chunk)
+
+    def read_region(self, x0, y0, x1, y1):
+        """Return (types, rotations) arrays of shape (y1 - y0, x1 - x0) in the Chunk encoding."""
+        types = np.zeros((y1 - y0, x1 - x0), np.uint16)
+        rotations = np.zeros((y1 - y0, x1 - x0), np.uint8)
+        for _, chunk, local, region in self.region_blocks(x0, y0, x1, y1):
+            chunk_types, chunk_rotations = self.chunk_views(chunk)
+            types[region] = chunk_types[local]
+            rotations[region] = chunk_rotations[local]
+        return types, rotations
+
+    def write_region(self, x0, y0, types, rotations, mask=None):
+        """Write (height, width) type and rotation arrays with their top-left tile at (x0, y0).
+
+        Types use the Chunk encoding (0 = empty, otherwise type id + 1). Cells
+        where `mask` is False keep their current tile.
+        """
+        height, width = types.shape
+        rotations = np.where(types != 0, rotations, 0).astype(np.uint8)
+        create = bool(np.any(types if mask is None else types[mask]))
+        for chunk_pos, chunk, local, region in self.region_blocks(x0, y0, x0 + width, y0 + height, create):
+            chunk_types, chunk_rotations = self.chunk_views(chunk)
+            if mask is None:
+                chunk_types[local] = types[region]
+                chunk_rotations[local] = rotations[region]
+            else:
+                region_mask = mask[region]
+                chunk_types[local][region_mask] = types[region][region_mask]
+                chunk_rotations[local][region_mask] = rotations[region][region_mask]
+            self.recount(chunk_pos, chunk)
+
+    def clear_region(self, x0, y0, x1, y1):
+        """Remove every tile with x0 <= x < x1 and y0 <= y < y1. Returns the number removed."""
+        removed = 0
+        for chunk_pos, chunk, local, _ in self.region_blocks(x0, y0, x1, y1):
+            chunk_types, chunk_rotations = self.chunk_views(chunk)
+            removed += int(np.count_nonzero(chunk_types[local]))
+            chunk_types[local] = 0
+            chunk_rotations[local] = 0
+            self.recount(chunk_pos, chunk)
+        return removed
+
+    def fill_region(self, x0, y0, x1, y1, type_name, rotate=0, mask=None):
+        """Place `type_name` on every tile of a region (only where `mask` is True if given)."""
+        shape = (y1 - y0, x1 - x0)
+        self.write_region(
+            x0, y0, np.full(shape, self.type_id(type_name) + 1, np.uint16), np.full(shape, rotate % 4, np.uint8), mask
+        )
+
+    def connected_region(self, x, y, x0, y0, x1, y1):
+        """Find the tiles 4-connected to (x, y) that share its type (or are empty, like it), within a bound.
+
+        Returns (left, top, mask): the bool mask covers the bounding box of the
+        connected tiles, with its top-left tile at (left, top).
+        """
+        types, _ = self.read_region(x0, y0, x1, y1)
+        filled = scanline_fill(types == types[y - y0, x - x0], x - x0, y - y0)
+        rows = np.flatnonzero(filled.any(axis=1))
+        columns = np.flatnonzero(filled.any(axis=0))
+        top, bottom = int(rows[0]), int(rows[-1]) + 1
+        left, right = int(columns[0]), int(columns[-1]) + 1
+        return x0 + left, y0 + top, filled[top:bottom, left:right]
+
+    def rotate_region(self, x0, y0, x1, y1, turns=1):
+        """Rotate every tile of a region by a number of quarter turns."""
+        for _, chunk, local, _ in self.region_blocks(x0, y0, x1, y1):
+            chunk_types, chunk_rotations = self.chunk_views(chunk)
+            painted = chunk_types[local] != 0
+            rotations = chunk_rotations[local]
+            rotations[painted] = (rotations[painted] + turns) % 4
+            self.touch(chunk)
+
+    def move_region(self, x0, y0, x1, y1, dx, dy):
+        """Move the tiles of a region by (dx, dy) tiles, replacing the tiles they land on."""
+        types, rotations = self.read_region(x0, y0, x1, y1)
+        self.clear_region(x0, y0, x1, y1)
+        self.write_region(x0 + dx, y0 + dy, types, rotations, types != 0)
+
+    def load_chunks(self, chunk_size, type_names, chunk_records):
+        """Replace the contents with raw chunk arrays.
+
+        `chunk_records` yields (chunk_pos, types, rotations) where types and
+        rotations are little-endian bytes-like arrays in the Chunk layout and
+        type ids index `type_names`.
+        """
+        self.clear()
+        if chunk_size != self.chunk_size:
+            # Different chunk layout: load it as is, then copy tile by tile
+            source = TileMap(chunk_size)
+            source.load_chunks(chunk_size, type_names, chunk_records)
+            for x, y, type_name, rotate in source:
+                self.set(x, y, type_name, rotate)
+            return
+
+        self.type_names = list(type_names)
+        self.type_ids = {type_name: type_id for type_id, type_name in enumerate(self.type_names)}
+        area = chunk_size * chunk_size
+        for chunk_pos, types, rotations in chunk_records:
+            chunk = Chunk(chunk_size)
+            chunk.types = array.array("H")
+            chunk.types.frombytes(types)
+            chunk.rotations = array.array("B")
+            chunk.rotations.frombytes(rotations)
+            if sys.byteorder == "big":
+                chunk.types.byteswap()
+
+            chunk.count = area - chunk.types.count(0)
+            if chunk.count:
+                self.chunks[tuple(chunk_pos)] = chunk
+                self.count += chunk.count
+                self.touch(chunk)
+
+    def to_dict(self):
+        """Return the tiles in the JSON map layout ("x;y" -> tile dict)."""
+        return {
+            f"{x};{y}": {
+                "pos": [x, y],
+                "type": type_name,
+                "rotate": rotate
+            }
+            for x, y, type_name, rotate in self
+        }
+
+    def load_dict(self, data):
+        """Replace the contents with tiles in the JSON map layout."""
+        self.clear()
+        for tile in data.values():
+            self.set(tile["pos"][0], tile["pos"][1], tile["type"], tile["rotate"])
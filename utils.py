@@ -1,14 +1,146 @@
 import pygame 
-import os
-from Settings import ASSETS_FOLDER_PATH
-
-def load_assets():
-    Assets = {}
-    #Load and return all tile assets. 
-    for file in os.listdir(ASSETS_FOLDER_PATH) :
-        if file.endswith(".png"):
-            key = os.path.splitext(file)[0]
-            img_path = os.path.join(ASSETS_FOLDER_PATH,file)
-            Assets[key] = pygame.image.load(img_path).convert()
-
-    return Assets
\ No newline at end of file
+import io
+import struct
+from collections import deque, OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Settings import ASSET_PACK_PATH, ASSET_LOADER_THREADS, ASSET_MEMORY_LIMIT, FRAME_STATS_WINDOW
+from asset_pack import list_png_files, open_pack
+
+def read_asset(img_path):
+    #Read and decode one image file. Runs on a worker thread.
+    with open(img_path, "rb") as file:
+        data = file.read()
+    return pygame.image.load(io.BytesIO(data), img_path)
+
+def read_png_size(img_path):
+    #Read (width, height) from a PNG header without decoding it, or None if it is not a PNG.
+    with open(img_path, "rb") as file:
+        header = file.read(24)
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+def load_assets(progress=None):
+    #Return a lazy registry of all tile assets. 
+    #When ASSET_PACK_PATH is set the assets are served from the memory-mapped pack,
+    #which is rebuilt first (reporting progress(done, total)) if any PNG changed.
+    paths = list_png_files()
+    pack = None
+    if ASSET_PACK_PATH is not None:
+        pack = open_pack(paths, decode=read_asset, progress=progress)
+
+    return AssetRegistry(paths, pack)
+
+
+class AssetRegistry(Mapping):
+    """Read-only mapping of asset name -> Surface that decodes assets on first use.
+
+    Every asset name is known up front, but an image is only read and decoded
+    when it is first looked up, from the asset pack if there is one. Decoded surfaces are kept in LRU order and the
+    least recently used ones are dropped once they take more than
+    `memory_limit` bytes (None for no limit); they are decoded again if needed.
+    The functions in `eviction_listeners` are called with each dropped name so
+    caches derived from the surfaces can let go of them as well.
+    """
+
+    def __init__(self, paths, pack=None, memory_limit=ASSET_MEMORY_LIMIT):
+        self.paths = paths  # key: asset name value: file path
+        self.pack = pack
+        self.memory_limit = memory_limit
+        self.surfaces = OrderedDict()  # decoded assets, least recently used first
+        self.sizes = {}  # key: asset name value: (width, height)
+        self.memory_used = 0
+        self.decodes = 0
+        self.evictions = 0
+        self.eviction_listeners = []  # called with the name of each evicted asset
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __contains__(self, key):
+        return key in self.paths
+
+    def __getitem__(self, key):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        if self.pack is not None:
+            return self.store(key, self.pack.surface(key).convert())
+        return self.store(key, read_asset(self.paths[key]).convert())
+
+    def get_size(self, key):
+        """Return the (width, height) of an asset, reading only the file header if possible."""
+        if key not in self.sizes:
+            if self.pack is not None:
+                size = self.pack.get_size(key)
+            else:
+                size = read_png_size(self.paths[key])
+            if size is None:
+                size = self[key].get_size()
+            self.sizes[key] = size
+        return self.sizes[key]
+
+    def store(self, key, surface):
+        """Keep a decoded surface, evicting old ones past the memory limit."""
+        self.surfaces[key] = surface
+        self.sizes[key] = surface.get_size()
+        self.memory_used += surface.get_bytesize() * surface.get_width() * surface.get_height()
+        self.decodes += 1
+
+        if self.memory_limit is not None:
+            while self.memory_used > self.memory_limit and len(self.surfaces) > 1:
+                evicted_key, evicted = self.surfaces.popitem(last=False)
+                self.memory_used -= evicted.get_bytesize() * evicted.get_width() * evicted.get_height()
+                self.evictions += 1
+                for listener in self.eviction_listeners:
+                    listener(evicted_key)
+        return surface
+
+    def preload(self, keys, progress=None):
+        """Decode several assets in parallel ahead of their first use.
+
+        Files are read and decoded on a thread pool and convert() runs on the
+        main thread. progress(done, total) is called on the main thread after
+        each asset.
+        """
+        keys = [key for key in dict.fromkeys(keys) if key in self.paths and key not in self.surfaces]
+        if not keys:
+            return
+
+        # Pack surfaces need no decoding
+        if self.pack is not None:
+            for done, key in enumerate(keys, 1):
+                self[key]
+                if progress is not None:
+                    progress(done, len(keys))
+            return
+
+        with ThreadPoolExecutor(max_workers=ASSET_LOADER_THREADS) as pool:
+            futures = {pool.submit(read_asset, self.paths[key]): key for key in keys}
+            for done, future in enumerate(as_completed(futures), 1):
+                self.store(futures[future], future.result().convert())
+                if progress is not None:
+                    progress(done, len(futures))
+
+
+class FrameStats:
+    """Average and peak of the most recent frame times, in milliseconds."""
+
+    def __init__(self, window=FRAME_STATS_WINDOW):
+        self.frame_times = deque(maxlen=window)
+
+    def add(self, frame_time):
+        self.frame_times.append(frame_time)
+
+    def average(self):
+        if not self.frame_times:
+            return 0.0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    def peak(self):
+        return max(self.frame_times, default=0.0)